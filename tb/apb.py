@@ -30,13 +30,19 @@ Testbench of the apbi2c controller - APB Transaction and Agent
 
 """
 
+from collections import namedtuple
+
 import cocotb
 from cocotb.triggers import RisingEdge, ReadOnly
+from cocotb.utils import get_sim_time
 from cocotb_bus.drivers import BusDriver
 from cocotb_bus.monitors import BusMonitor
 
 from cocotb_coverage.crv import Randomized
 
+from profiling import WakeupCounter
+from sampling import Sampler
+
 #APB Transaction object
 class APBTransaction(Randomized):
 
@@ -50,8 +56,13 @@ class APBTransaction(Randomized):
         #delay as a random variable
         self.add_rand("delay", range(0,10))
 
+#APB Monitor record - lightweight immutable object with the values resolved 
+#at sampling time (data is None if not resolvable, e.g. 'x' on the bus)
+class APBRecord(namedtuple("APBRecord", ["addr", "data", "write", "delay"])):
+    __slots__ = ()
+
 #APB Interface Logic
-class APBSlave(BusDriver, BusMonitor):
+class APBSlave(BusDriver, BusMonitor, WakeupCounter):
     '''
     APB Slave
     '''
@@ -60,8 +71,19 @@ class APBSlave(BusDriver, BusMonitor):
         "PREADY",  "PRDATA"
         ]
 
-    def __init__(self, entity, name, clock):
+    def __init__(self, entity, name, clock, event_driven=True):
+        #event driven monitor sleeps while the bus is idle, otherwise the 
+        #bus is sampled at every clock edge
+        self.event_driven = event_driven
         BusDriver.__init__(self, entity, name, clock)
+        #monitor samples the handshake at each sampled clock edge, the 
+        #transfer signals only when a transfer completes
+        self.sampler = Sampler(self.bus, self._signals, "apb")
+        self._sample_select = self.sampler.reader("PSELx")
+        self._sample_handshake = self.sampler.reader("PENABLE", "PREADY")
+        self._sample_transfer = self.sampler.reader("PWRITE", "PADDR")
+        self._sample_wdata = self.sampler.reader("PWDATA")
+        self._sample_rdata = self.sampler.reader("PRDATA")
         BusMonitor.__init__(self, entity, name, clock)
         self.clock = clock
         self.bus.PWRITE.setimmediatevalue(0)
@@ -70,45 +92,132 @@ class APBSlave(BusDriver, BusMonitor):
         self.bus.PADDR.setimmediatevalue(0)
         self.bus.PWDATA.setimmediatevalue(0)
         
-    #APB DRIVER: Transaction Executed by Master
+    #APB DRIVER: transfers of concurrent sequences are serialized with the 
+    #lock of the cocotb_bus Driver, busy is checked again after the wake-up, 
+    #as the lock may have been taken by another sequence meanwhile
+    async def _acquire_lock(self):
+        while self.busy:
+            await self.busy_event.wait()
+        self.busy_event.clear()
+        self.busy = True
+        
     async def send(self, transaction):
+        await self._acquire_lock()
+        try:
+            return await self._send_one(transaction)
+        finally:
+            self._release_lock()
+            
+    async def send_many(self, transactions, idle=False):
+        await self._acquire_lock()
+        try:
+            return await self._send_many(transactions, idle)
+        finally:
+            self._release_lock()
+            
+    #APB DRIVER: Transaction Executed by Master
+    async def _send_one(self, transaction):
         rval = 0
-        await RisingEdge(self.clock)
+        await self._wait(RisingEdge(self.clock))
         self.bus.PADDR.value = transaction.addr
         self.bus.PWDATA.value = transaction.data
         self.bus.PSELx.value = 1
         self.bus.PWRITE.value = 1 if transaction.write else 0
-        await RisingEdge(self.clock)
+        await self._wait(RisingEdge(self.clock))
         self.bus.PENABLE.value = 1
         while True:
-            await ReadOnly()
+            await self._wait(ReadOnly())
             if (self.bus.PREADY == 1):
-                rval = self.bus.PRDATA
+                rval = self.bus.PRDATA.value
                 break
-            await RisingEdge(self.clock)
-        await RisingEdge(self.clock)
+            await self._wait(RisingEdge(self.clock))
+        await self._wait(RisingEdge(self.clock))
+        self._idle()
+        for i in range(transaction.delay):
+            await self._wait(RisingEdge(self.clock))
+        return rval
+
+    #APB DRIVER: burst of transactions executed back-to-back, the setup 
+    #phase of a transfer directly follows the access phase of the previous 
+    #one, idle cycles (transaction delay) are inserted only if requested
+    async def _send_many(self, transactions, idle=False):
+        rvals = []
+        await self._wait(RisingEdge(self.clock))
+        for transaction in transactions:
+            self.bus.PADDR.value = transaction.addr
+            self.bus.PWDATA.value = transaction.data
+            self.bus.PSELx.value = 1
+            self.bus.PWRITE.value = 1 if transaction.write else 0
+            self.bus.PENABLE.value = 0
+            await self._wait(RisingEdge(self.clock))
+            self.bus.PENABLE.value = 1
+            while True:
+                await self._wait(ReadOnly())
+                if (self.bus.PREADY == 1):
+                    rvals.append(self.bus.PRDATA.value)
+                    break
+                await self._wait(RisingEdge(self.clock))
+            await self._wait(RisingEdge(self.clock))
+            if idle and (transaction.delay > 0):
+                self._idle()
+                for i in range(transaction.delay):
+                    await self._wait(RisingEdge(self.clock))
+        self._idle()
+        return rvals
+        
+    def _idle(self):
         self.bus.PADDR.value = 0
         self.bus.PWDATA.value = 0
         self.bus.PSELx.value = 0
         self.bus.PWRITE.value = 0
         self.bus.PENABLE.value = 0
-        for i in range(transaction.delay):
-            await RisingEdge(self.clock)
-        return rval
 
     #APB MONITOR: Observe interface to monitor all transactions
     async def _monitor_recv(self):
+        if self.event_driven:
+            await self._monitor_recv_events()
+        else:
+            await self._monitor_recv_cycles()
+            
+    async def _monitor_recv_cycles(self):
         delay = 0
         while True:
-            await RisingEdge(self.clock)
-            await ReadOnly()
-            if (self.bus.PENABLE == 1) & (self.bus.PREADY == 1):
-                data = self.bus.PWDATA if self.bus.PWRITE \
-                  else self.bus.PRDATA
-                xaction = APBTransaction(
-                  self.bus.PADDR, data, self.bus.PWRITE == 1, delay
-                )
+            await self._wait(RisingEdge(self.clock))
+            await self._wait(ReadOnly())
+            penable, pready = self._sample_handshake()
+            if (penable == 1) & (pready == 1):
+                self._recv_transfer(delay)
                 delay = 0
-                self._recv(xaction)
             else:
                 delay = delay + 1
+                
+    #sample the bus only while PSELx is asserted, the delay (number of 
+    #clock cycles since the previous transfer) is computed from the 
+    #simulation time
+    async def _monitor_recv_events(self):
+        first = None
+        period = 0
+        last_edge = -1
+        while True:
+            #bus idle - sleep until the setup phase of the next transfer
+            if period and (self._sample_select()[0] != 1):
+                await self._wait(RisingEdge(self.bus.PSELx))
+            await self._wait(RisingEdge(self.clock))
+            await self._wait(ReadOnly())
+            now = get_sim_time()
+            #the clock period is measured on the first two clock edges
+            if first is None:
+                first = now
+            elif not period:
+                period = now - first
+            edge = (now - first)//period if period else 0
+            penable, pready = self._sample_handshake()
+            if (penable == 1) & (pready == 1):
+                self._recv_transfer(edge - last_edge - 1)
+                last_edge = edge
+                
+    def _recv_transfer(self, delay):
+        pwrite, paddr = self._sample_transfer()
+        write = pwrite == 1
+        (data,) = self._sample_wdata() if write else self._sample_rdata()
+        self._recv(APBRecord(paddr, data, write, delay))
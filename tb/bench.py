@@ -0,0 +1,352 @@
+"""
+Testbench of the apbi2c controller - simulator-free benchmark suite
+
+Runs the agents (APBSlave, I2CDriver, I2CMonitor), the coverage sections, 
+the scoreboard and the trace recorder against the simulator stand-in (see 
+mocksim.py) and reports items per second, trigger waits per item, memory 
+kept per item (blocks and bytes still allocated after the run, i.e. 
+records and state kept) and the peak of the temporary memory (bytes 
+allocated during the run above what is kept). The .binary benchmarks read the signals as 
+cocotb handles (BinaryValue at each access, see mocksim.py).
+
+Rates are normalized by the speed of a fixed pure Python workload, so the 
+baseline (bench_baseline.json) may be compared across machines. The check 
+fails if a rate drops, or a cost (triggers, allocations) grows by more than 
+the tolerance against the baseline.
+
+    python bench.py [--update] [--tolerance 0.25]
+
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from cocotb.binary import BinaryValue
+
+import apb
+import checkpoints
+import i2c
+import profiling
+import recorder
+import scoreboard
+from apb import APBSlave, APBTransaction, APBRecord
+from i2c import I2CDriver, I2CMonitor, I2CTransaction, I2CRecord
+from mocksim import MockSim, MockEntity
+
+TB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BASELINE_FILE = os.path.join(TB_DIR, "bench_baseline.json")
+
+#clock period in simulation steps
+PERIOD = 1000
+
+SEED = 1
+
+APB_SIGNALS = {
+  "PWRITE": 0, "PSELx": 0, "PENABLE": 0, "PADDR": 0, "PWDATA": 0,
+  "PREADY": 1, "PRDATA": 0x5A5A5A5A
+}
+
+I2C_SIGNALS = {"SDA": 1, "SCL": 1}
+
+#metrics where a higher value is better, the others are costs
+RATES = ["normalized_rate"]
+
+#fixed pure Python workload (calls, attributes, containers), returns 
+#iterations per second
+def calibrate(iterations=200000, repeat=5):
+    class _Item(object):
+        def __init__(self, value):
+            self.value = value
+    def _work(item, table):
+        table[item.value & 0xFF] = table.get(item.value & 0xFF, 0) + 1
+        return item.value >> 1
+    best = None
+    for r in range(repeat):
+        table = {}
+        start = time.perf_counter()
+        for i in range(iterations):
+            _work(_Item(i), table)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return iterations/best
+
+#APB transfers, burst of the given length (send_many) or one by one (send)
+def bench_apb(n, burst=0, event_driven=True, binary=False):
+    random.seed(SEED)
+    transactions = [
+      APBTransaction(4*random.randint(0,3), random.randint(0,0xFFFFFFFF),
+        random.random() < 0.5, random.randint(0,3)) for i in range(n)
+    ]
+    async def send(slave):
+        if burst:
+            for i in range(0, n, burst):
+                await slave.send_many(transactions[i:i+burst])
+        else:
+            for transaction in transactions:
+                await slave.send(transaction)
+    def run():
+        sim = MockSim(PERIOD, binary=binary)
+        records = []
+        with sim.patched(apb, profiling):
+            slave = APBSlave(MockEntity(sim, APB_SIGNALS), None, sim.clock,
+              event_driven=event_driven)
+            slave.add_callback(records.append)
+            sim.run(send(slave))
+        if len(records) != n:
+            raise SystemExit("APB: %d transfers sent, %d received" % 
+              (n, len(records)))
+        return sim.triggers, records
+    return run
+
+#I2C words driven and decoded on the same bus
+def bench_i2c(n, fast=True, edge_driven=True, binary=False):
+    random.seed(SEED)
+    transactions = [
+      I2CTransaction(random.randint(0,0xFFFFFFFF), True, random.randint(1,8))
+      for i in range(n)
+    ]
+    async def send(driver):
+        for transaction in transactions:
+            await driver.send(transaction)
+    def run():
+        sim = MockSim(PERIOD, binary=binary)
+        records = []
+        with sim.patched(i2c, profiling):
+            entity = MockEntity(sim, I2C_SIGNALS)
+            driver = I2CDriver(entity, "", sim.clock, fast=fast)
+            monitor = I2CMonitor(entity, "", sim.clock,
+              edge_driven=edge_driven)
+            monitor.add_callback(records.append)
+            sim.run(send(driver))
+        if records != transactions:
+            raise SystemExit("I2C: received words do not match sent ones")
+        return sim.triggers, records
+    return run
+
+#coverage section sampling of the records
+def bench_coverage(n, section):
+    import coverage
+    random.seed(SEED)
+    if section == "apb":
+        sampled = coverage.APBCoverage(lambda xaction : None)
+        samples = [
+          (APBRecord(4*random.randint(0,3), random.randint(0,0xFFFFFFFF),
+            random.random() < 0.5, random.randint(0,15)),)
+          for i in range(n)
+        ]
+    elif section == "i2c":
+        sampled = coverage.I2CCoverage(lambda xaction : None)
+        samples = [
+          (I2CRecord(random.randint(0,0xFFFFFFFF), False),) for i in range(n)
+        ]
+    else:
+        from operations import Operation
+        sampled = coverage.OperationsCoverage(lambda operation, ok : None)
+        samples = [
+          (Operation(random.choice(["read", "write"]), 
+            random.randint(1,31), random.randint(1,31)), True)
+          for i in range(n)
+        ]
+    def run():
+        for args in samples:
+            sampled(*args)
+        return 0, None
+    return run
+
+#expected/received items compared in windows of depth items
+def bench_scoreboard(n, depth=16):
+    random.seed(SEED)
+    items = [I2CRecord(random.randint(0,0xFFFFFFFF), False) for i in range(n)]
+    def run():
+        with MockSim(PERIOD).patched(scoreboard):
+            board = scoreboard.StreamingScoreboard("bench", depth)
+            for i in range(0, n, depth):
+                window = items[i:i+depth]
+                for item in window:
+                    board.expect(item)
+                for item in window:
+                    board.compare(item)
+                board.flush()
+        if board.errors:
+            raise SystemExit("Scoreboard: unexpected errors")
+        return 0, board
+    return run
+
+#trace recording of monitor records (in the ring buffers only)
+def bench_recorder(n):
+    random.seed(SEED)
+    items = [
+      APBRecord(4*random.randint(0,3), random.randint(0,0xFFFFFFFF),
+        random.random() < 0.5, random.randint(0,15)) for i in range(n)
+    ]
+    def run():
+        with MockSim(PERIOD).patched(recorder):
+            trace = recorder.TraceRecorder()
+            for item in items:
+                trace.apb(item)
+        return 0, trace
+    return run
+
+#capture of a chain of checkpoints (each one differs from its parent in a 
+#few signals) in a store with a memory budget of a few full checkpoints, 
+#stored in full or incrementally
+def bench_checkpoints(n, incremental, signals=2000, changes=20):
+    random.seed(SEED)
+    def value(width):
+        return BinaryValue("".join(random.choice("01") for i in range(width)),
+          width)
+    widths = dict(("sig%d" % i, random.choice([1, 1, 1, 8, 32]))
+      for i in range(signals))
+    snapshot = dict((signal, value(width)) 
+      for (signal, width) in widths.items())
+    snapshots = [snapshot]
+    for i in range(1, n):
+        snapshot = dict(snapshot)
+        for signal in random.sample(list(widths), changes):
+            snapshot[signal] = value(widths[signal])
+        snapshots.append(snapshot)
+    budget = 16*len("\n".join("%d:b%s" % (i, v.binstr) 
+      for (i, v) in enumerate(snapshots[0].values())))
+    def run():
+        spill_dir = tempfile.mkdtemp()
+        try:
+            store = checkpoints.CheckpointStore(budget, 
+              spill_dir=spill_dir, incremental=incremental)
+            store.add("0", snapshots[0])
+            for i in range(1, n):
+                store.add(str(i), snapshots[i], parent=str(i-1))
+        finally:
+            shutil.rmtree(spill_dir)
+        return 0, None
+    return run
+
+#name: (number of items, benchmark)
+BENCHMARKS = {
+  "apb.send": (2000, lambda n : bench_apb(n)),
+  "apb.send_many": (2000, lambda n : bench_apb(n, burst=16)),
+  "apb.send_many.cycles": (2000, 
+    lambda n : bench_apb(n, burst=16, event_driven=False)),
+  "apb.send_many.binary": (2000, 
+    lambda n : bench_apb(n, burst=16, binary=True)),
+  "i2c.fast": (200, lambda n : bench_i2c(n)),
+  "i2c.per_cycle": (50, 
+    lambda n : bench_i2c(n, fast=False, edge_driven=False)),
+  "i2c.per_cycle.binary": (50, 
+    lambda n : bench_i2c(n, fast=False, edge_driven=False, binary=True)),
+  "coverage.apb": (20000, lambda n : bench_coverage(n, "apb")),
+  "coverage.i2c": (20000, lambda n : bench_coverage(n, "i2c")),
+  "coverage.op": (5000, lambda n : bench_coverage(n, "op")),
+  "scoreboard": (50000, lambda n : bench_scoreboard(n)),
+  "recorder": (50000, lambda n : bench_recorder(n)),
+  "checkpoint.full": (200, lambda n : bench_checkpoints(n, False)),
+  "checkpoint.incremental": (200, lambda n : bench_checkpoints(n, True)),
+}
+
+#best of repeated runs, then a run with allocation tracing
+def measure(n, run, calibration, repeat=3):
+    best = None
+    for r in range(repeat):
+        start = time.perf_counter()
+        triggers, kept = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del kept
+    #same collector state for each benchmark, the peak includes the cycles 
+    #not collected yet
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    triggers, kept = run()
+    current, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return {
+      "rate": n/best,
+      "normalized_rate": n/best/calibration,
+      "triggers": triggers/n,
+      "kept_blocks": sum(stat.count_diff for stat in stats)/n,
+      "kept_bytes": sum(stat.size_diff for stat in stats)/n,
+      "peak_bytes": peak - current,
+    }
+
+#list of regressions against the baseline
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, value in metrics.items():
+            if metric == "rate" or metric not in baseline[name]:
+                continue
+            reference = baseline[name][metric]
+            if metric in RATES:
+                failed = value < reference*(1 - tolerance)
+            else:
+                failed = value > reference*(1 + tolerance) + 0.5
+            if failed:
+                regressions.append("%s %s: %.3g (baseline %.3g)" % 
+                  (name, metric, value, reference))
+    return regressions
+
+def run_benchmarks(names, tolerance, baseline_file, update):
+    calibration = calibrate()
+    print("calibration: %.0f iterations/s" % calibration)
+    print("%-22s | %10s | %9s | %9s | %9s | %9s" % 
+      ("benchmark", "items/s", "trig/item", "blk/item", "B/item", "peak B"))
+    results = {}
+    for name in names:
+        n, bench = BENCHMARKS[name]
+        results[name] = measure(n, bench(n), calibration)
+        print("%-22s | %10.0f | %9.1f | %9.1f | %9.0f | %9.0f" % (name, 
+          results[name]["rate"], results[name]["triggers"], 
+          results[name]["kept_blocks"], results[name]["kept_bytes"],
+          results[name]["peak_bytes"]))
+    if update:
+        with open(baseline_file, "w") as f:
+            json.dump({"python": platform.python_version(), 
+              "benchmarks": results}, f, indent=2, sort_keys=True)
+        print("Baseline written to %s" % baseline_file)
+        return True
+    if not os.path.exists(baseline_file):
+        print("No baseline (%s), run with --update" % baseline_file)
+        return True
+    with open(baseline_file) as f:
+        baseline = json.load(f)["benchmarks"]
+    regressions = compare(results, baseline, tolerance)
+    for regression in regressions:
+        print("REGRESSION: %s" % regression)
+    if not regressions:
+        print("No regression against %s" % baseline_file)
+    return not regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+      description="Simulator-free benchmarks of the apbi2c testbench")
+    parser.add_argument("--update", action="store_true",
+      help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+      help="allowed relative slowdown against the baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+      help="baseline file")
+    parser.add_argument("benchmarks", nargs="*", default=list(BENCHMARKS),
+      help="benchmarks to run (default all)")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark %s (%s)" % 
+              (name, ", ".join(BENCHMARKS)))
+    ok = run_benchmarks(args.benchmarks, args.tolerance, args.baseline, 
+      args.update)
+    sys.exit(0 if ok else 1)
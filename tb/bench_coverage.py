@@ -0,0 +1,68 @@
+"""
+Testbench of the apbi2c controller - cover points micro-benchmark
+
+Compares the sampling speed of the cocotb_coverage CoverPoint and the
+IndexedCoverPoint (see coverpoint.py) for the bins used in coverage.py and
+checks that both collect the same hits.
+
+    python bench_coverage.py
+
+"""
+
+import random
+import timeit
+
+from cocotb_coverage.coverage import CoverPoint, coverage_section
+from coverpoint import IndexedCoverPoint
+
+N_SAMPLES = 20000
+
+RANGES = [(1,3), (4,7), (8,11), (12,15), (16,23), (24,31)]
+
+#the same cover points as in coverage.py
+def define_section(name, cover_point):
+    return coverage_section(
+      cover_point("bench.%s.data" % name,
+        xf = lambda data, delay, repeat : data >> 24,
+        bins = list(range(0,255))
+      ),
+      cover_point("bench.%s.delay" % name,
+        xf = lambda data, delay, repeat : delay,
+        rel = lambda _val, _range : _range[0] < _val < _range[1],
+        bins = [(0,3), (4,7), (8,15)],
+        bins_labels = ["small", "medium", "big"]
+      ),
+      cover_point("bench.%s.repeat" % name,
+        xf = lambda data, delay, repeat : repeat,
+        rel = lambda _val, _range : _range[0] <= _val <= _range[1],
+        bins = RANGES
+      )
+    )
+
+if __name__ == "__main__":
+    random.seed(1)
+    samples = [
+      (random.randint(0,0xFFFFFFFF), random.randint(0,20),
+       random.randint(1,31)) for i in range(N_SAMPLES)
+    ]
+    results = {}
+    for name, cover_point in [("plain", CoverPoint), 
+      ("indexed", IndexedCoverPoint)]:
+        @define_section(name, cover_point)
+        def sample(data, delay, repeat):
+            pass
+        def run():
+            for args in samples:
+                sample(*args)
+        elapsed = timeit.timeit(run, number=1)
+        results[name] = elapsed
+        print("%-8s: %10.0f samples/s" % (name, N_SAMPLES/elapsed))
+    from cocotb_coverage.coverage import coverage_db
+    for item in ["data", "delay", "repeat"]:
+        plain = coverage_db["bench.plain.%s" % item]
+        indexed = coverage_db["bench.indexed.%s" % item]
+        if (list(plain.detailed_coverage.values()) != 
+          list(indexed.detailed_coverage.values())) or \
+          (plain.coverage != indexed.coverage):
+            raise SystemExit("Coverage mismatch at %s!" % item)
+    print("speedup : %10.1f" % (results["plain"]/results["indexed"]))
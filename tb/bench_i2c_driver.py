@@ -0,0 +1,48 @@
+"""
+Testbench of the apbi2c controller - I2C Driver benchmark
+
+Runs the per-cycle and the fast mode of the I2CDriver against a simple
+simulator stand-in (mocksim.py, no simulator needed), checks that the SCL/SDA
+waveforms are identical and reports the number of triggers per word.
+
+    python bench_i2c_driver.py
+
+"""
+
+import random
+
+import i2c
+from i2c import I2CDriver, I2CTransaction
+from mocksim import MockSim, MockEntity
+
+#clock period in simulation steps
+PERIOD = 1000
+
+#run a number of words through the driver, return trace and triggers count
+def run_driver(fast, words, divider):
+    sim = MockSim(PERIOD, trace=True)
+    #start outside of a clock edge
+    sim.now = 3*PERIOD + PERIOD//3
+    with sim.patched(i2c):
+        driver = I2CDriver(MockEntity(sim, {"SDA": 1, "SCL": 1}), "", 
+          sim.clock, fast=fast)
+        async def send():
+            for data in words:
+                await driver.send(I2CTransaction(data, True, divider))
+        sim.run(send())
+    return sim.trace, sim.triggers
+
+if __name__ == "__main__":
+    random.seed(1)
+    n_words = 8
+    print("divider | per-cycle triggers/word | fast triggers/word | ratio")
+    for divider in range(1, 32):
+        words = [random.randint(0,0xFFFFFFFF) for i in range(n_words)]
+        trace_ref, triggers_ref = run_driver(False, words, divider)
+        trace_fast, triggers_fast = run_driver(True, words, divider)
+        if trace_ref != trace_fast:
+            raise SystemExit("Waveform mismatch at divider %d!" % divider)
+        print("%7d | %23.1f | %18.1f | %5.1f" % (divider,
+          triggers_ref/n_words, triggers_fast/n_words,
+          triggers_ref/triggers_fast)
+        )
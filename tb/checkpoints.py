@@ -0,0 +1,307 @@
+"""
+Testbench of the apbi2c controller - checkpoints storage
+
+A checkpoint (see cocotb_checkpoint) is a map of the DUT signals handles to
+their values, all checkpoints of a test contain the same signals.
+
+"""
+
+import math
+import os
+import random
+import sys
+import zlib
+from collections import OrderedDict
+
+from cocotb.binary import BinaryValue
+
+#compact text form of the signal value
+def _encode(value):
+    if isinstance(value, BinaryValue):
+        return "b" + value.binstr
+    if isinstance(value, int):
+        return "i%d" % value
+    if isinstance(value, float):
+        return "r" + repr(value)
+    return "s" + bytes(value).hex()
+
+#values of a signal equal (same encoded form), without encoding
+def _same(a, b):
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    if type(a) is BinaryValue:
+        return a.binstr == b.binstr
+    return a == b
+
+def _decode(text):
+    tag, body = text[0], text[1:]
+    if tag == "b":
+        return BinaryValue(body, n_bits=len(body))
+    if tag == "i":
+        return int(body)
+    if tag == "r":
+        return float(body)
+    return bytes.fromhex(body)
+
+#checkpoint in a file (same form as spilled checkpoints), signals identified
+#by their path, to be restored in another simulation of the same DUT
+def save_checkpoint(filename, snapshot):
+    with open(filename, "wb") as f:
+        f.write(zlib.compress("\n".join(
+          "%s:%s" % (signal._path, _encode(value)) 
+          for (signal, value) in snapshot.items()
+        ).encode()))
+
+#signals - handles of the checkpoint (e.g. keys of checkpoint())
+def load_checkpoint(filename, signals):
+    handles = dict((signal._path, signal) for signal in signals)
+    with open(filename, "rb") as f:
+        lines = zlib.decompress(f.read()).decode().split("\n")
+    snapshot = {}
+    for line in lines:
+        if line:
+            path, value = line.rsplit(":", 1)
+            snapshot[handles[path]] = _decode(value)
+    return snapshot
+
+#Checkpoints map with a memory budget
+class CheckpointStore(object):
+    '''
+    Checkpoint Store
+
+    Dict-like container of (checkpoint, operation) pairs. Checkpoints are 
+    kept in memory in the encoded form (one line per signal) and decoded 
+    when accessed, at most budget bytes of them, when exceeded, a checkpoint
+    is evicted - the least recently used one 
+    (policy "lru") or the one with the lowest coverage contribution score 
+    (policy "coverage", see credit()). Evicted checkpoints are spilled to 
+    spill_dir as zlib-compressed files and loaded back when accessed.
+
+    In the incremental mode, a checkpoint added with a parent stores only
+    the signals which differ from the parent, so checkpoints form a tree.
+    The full checkpoint is rebuilt by applying the changes along the chain 
+    of parents. A checkpoint is stored in full when the chain would be 
+    longer than max_chain. The last added or rebuilt checkpoint is kept 
+    decoded (not counted in the budget), as it is usually the parent of the
+    next one.
+    '''
+
+    def __init__(self, budget=64*1024*1024, policy="lru", 
+                 spill_dir="checkpoints", incremental=False, max_chain=8):
+        if policy not in ("lru", "coverage"):
+            raise ValueError("Unknown eviction policy %s" % policy)
+        self.budget = budget
+        self.policy = policy
+        self.spill_dir = spill_dir
+        self.incremental = incremental
+        self.max_chain = max_chain
+        #signals handles in the order of the encoded checkpoint
+        self._signals = None
+        #name -> encoded checkpoint (or changes to the parent) in memory, in 
+        #the order of use
+        self._memory = OrderedDict()
+        self._memory_usage = 0
+        #name -> operation, score, parent, chain length, size for all 
+        #checkpoints
+        self._operations = OrderedDict()
+        self._scores = {}
+        self._parents = {}
+        self._chains = {}
+        self._sizes = {}
+        self._spilled = set()
+        #(name, checkpoint) added or rebuilt last
+        self._last = (None, None)
+        self.spills = 0
+        self.loads = 0
+
+    def __len__(self):
+        return len(self._operations)
+
+    def __contains__(self, name):
+        return name in self._operations
+
+    def keys(self):
+        return list(self._operations.keys())
+
+    def __setitem__(self, name, item):
+        self.add(name, *item)
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def add(self, name, snapshot, operation=None, score=0, parent=None):
+        if self._signals is None:
+            self._signals = list(snapshot.keys())
+        if (not self.incremental) or (parent is None) or \
+          (self._chains[parent] >= self.max_chain):
+            data = self._encode(snapshot)
+            parent, chain = None, 0
+        else:
+            parent_snapshot = self._last[1] if self._last[0] == parent \
+              else self.get(parent)[0]
+            data = self._changes(parent_snapshot, snapshot)
+            chain = self._chains[parent] + 1
+        size = sys.getsizeof(data)
+        self._operations[name] = operation
+        self._scores[name] = score
+        self._parents[name] = parent
+        self._chains[name] = chain
+        self._sizes[name] = size
+        self._memory[name] = data
+        self._memory_usage += size
+        self._last = (name, snapshot)
+        self._evict(keep=name)
+
+    #returns (checkpoint, operation)
+    def get(self, name):
+        chain = [name]
+        while self._parents[chain[-1]] is not None:
+            chain.append(self._parents[chain[-1]])
+        snapshot = self._data(chain.pop())
+        while chain:
+            snapshot.update(self._data(chain.pop()))
+        self._last = (name, snapshot)
+        return (snapshot, self._operations[name])
+
+    #checkpoint or changes to the parent (decoded), loaded if needed
+    def _data(self, name):
+        if name in self._memory:
+            self._memory.move_to_end(name)
+        else:
+            self._memory[name] = self._load(name)
+            self._memory_usage += self._sizes[name]
+            self._evict(keep=name)
+        return self._decode(self._memory[name])
+
+    #encoded signals of the snapshot with values different than in the 
+    #parent, only the changed values are encoded
+    def _changes(self, parent, snapshot):
+        return "\n".join([
+          "%d:%s" % (i, _encode(snapshot[signal])) 
+          for (i, signal) in enumerate(self._signals) 
+          if not _same(snapshot[signal], parent[signal])
+        ]).encode()
+
+    #increase coverage contribution score of the checkpoint
+    def credit(self, name, score):
+        self._scores[name] += score
+
+    def score(self, name):
+        return self._scores[name]
+
+    @property
+    def memory_usage(self):
+        return self._memory_usage
+
+    def _evict(self, keep):
+        while (self._memory_usage > self.budget) and (len(self._memory) > 1):
+            candidates = [name for name in self._memory if name != keep]
+            if self.policy == "lru":
+                name = candidates[0]
+            else:
+                name = min(candidates, key=lambda name : self._scores[name])
+            self._spill(name, self._memory.pop(name))
+            self._memory_usage -= self._sizes[name]
+
+    def _path(self, name):
+        return os.path.join(self.spill_dir, "%s.chkp" % name)
+
+    #one line per signal: index of the signal and the encoded value
+    def _encode(self, snapshot):
+        return "\n".join([
+          "%d:%s" % (i, _encode(snapshot[signal])) 
+          for (i, signal) in enumerate(self._signals)
+        ]).encode()
+
+    def _decode(self, encoded):
+        data = {}
+        for line in encoded.decode().split("\n"):
+            if line:
+                i, value = line.split(":", 1)
+                data[self._signals[int(i)]] = _decode(value)
+        return data
+
+    #checkpoints do not change, so each one is written once
+    def _spill(self, name, encoded):
+        if name in self._spilled:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        with open(self._path(name), "wb") as f:
+            f.write(zlib.compress(encoded))
+        self._spilled.add(name)
+        self.spills += 1
+
+    def _load(self, name):
+        with open(self._path(name), "rb") as f:
+            encoded = zlib.decompress(f.read())
+        self.loads += 1
+        return encoded
+
+#Selection of the checkpoints to be restored
+class CheckpointScheduler(object):
+    '''
+    Checkpoint Scheduler
+
+    Bandit-style (UCB1) selection of the checkpoint to be restored. For each
+    checkpoint, the operation which produced it and the number of new 
+    coverage bins hit by the runs restored from it are recorded. The one 
+    with the highest mean gain (normalized to the highest gain of a single 
+    run) plus the exploration term is selected. A checkpoint never restored
+    is scored with the mean gain of its parent (the checkpoint restored 
+    before the operation which produced it), the checkpoints without parent
+    with the highest possible mean gain.
+    '''
+
+    def __init__(self, exploration=1.0):
+        self.exploration = exploration
+        #name -> [operation, restores, new bins, parent]
+        self._stats = OrderedDict()
+        self._restores = 0
+        self._max_gain = 0
+
+    def add(self, name, operation=None, parent=None):
+        self._stats[name] = [operation, 0, 0, parent]
+
+    #normalized mean gain, estimated from the parent if never restored
+    def _mean(self, name):
+        operation, restores, gain, parent = self._stats[name]
+        if restores:
+            return gain/(restores*self._max_gain) if self._max_gain else 0.0
+        if parent in self._stats:
+            return self._mean(parent)
+        return 1.0
+
+    def select(self):
+        log_restores = math.log(self._restores + 1)
+        best_score = None
+        for name, (operation, restores, gain, parent) in self._stats.items():
+            score = self._mean(name) + \
+              self.exploration*math.sqrt(log_restores/(restores + 1))
+            if (best_score is None) or (score > best_score):
+                best, best_score = [name], score
+            elif score == best_score:
+                best.append(name)
+        return random.choice(best)
+
+    #new_bins - number of coverage bins hit after restoring the checkpoint
+    def update(self, name, new_bins):
+        stats = self._stats[name]
+        stats[1] += 1
+        stats[2] += new_bins
+        self._restores += 1
+        self._max_gain = max(self._max_gain, new_bins)
+
+    #list of (name, operation, restores, new bins)
+    def statistics(self):
+        return [(name,) + tuple(stats[:3]) 
+          for name, stats in self._stats.items()]
+
+    def report(self, logger):
+        for name, operation, restores, gain in self.statistics():
+            logger("   checkpoint %s%s: restored %d times, %d new bins" % 
+              (name, "" if operation is None else 
+               " (%s of %d words, divider %d)" % (operation.direction, 
+                 operation.repeat, operation.divider), restores, gain)
+            )
@@ -32,6 +32,10 @@ Testbench of the apbi2c controller - functional coverage
 import cocotb
 
 from cocotb_coverage.coverage import *
+from coverpoint import IndexedCoverPoint
+
+#all cover points are IndexedCoverPoints (see coverpoint.py), the relation 
+#of the range bins is evaluated once per value, not for each sample and bin
 
 #Functional coverage of the tested controller - sort of a verification plan
 
@@ -39,18 +43,18 @@ from cocotb_coverage.coverage import *
 #from the register space
 #also cross of the delay with R/W
 APBCoverage = coverage_section(
-  CoverPoint("top.apb.delay", 
+  IndexedCoverPoint("top.apb.delay", 
     xf = lambda xaction : xaction.delay, 
     rel = lambda _val, _range : _range[0] < _val < _range[1],
-    bins = [(0,3), (4,7), (8,15)],
+    bins = [(0,3), (4,7), (8,15)], domain = range(0,16),
     bins_labels = ["small", "medium", "big"]
   ),
-  CoverPoint("top.apb.addr",  
+  IndexedCoverPoint("top.apb.addr",  
     xf = lambda xaction : xaction.addr, bins = [0,4,8,12],
     bins_labels = ["write_access", "read_access", "i2c_reg_config", 
       "i2c_reg_timeout"]
   ),
-  CoverPoint("top.apb.write", 
+  IndexedCoverPoint("top.apb.write", 
     xf = lambda xaction : xaction.write, bins = [True, False]
   ),
   CoverCross("top.apb.writeXdelay", 
@@ -60,28 +64,31 @@ APBCoverage = coverage_section(
 
 #I2C Functional Coverage - just check if different data processed
 I2CCoverage = coverage_section(
-  CoverPoint("top.i2c.data", 
+  IndexedCoverPoint("top.i2c.data", 
     xf = lambda xaction : xaction.data >> 24, 
-    bins = list(range(0,255))
+    bins = list(range(0,255)),
+    domain = range(0,256)
   ),
 )
 
 #Operations coverage: READ/WRITE, number of words transmitted and clock divider
 #cross of the above as a main verification goal
 OperationsCoverage = coverage_section(
-  CoverPoint("top.op.direction",  
+  IndexedCoverPoint("top.op.direction",  
     xf = lambda operation, ok : operation.direction, 
     bins = ['read', 'write']
   ),
-  CoverPoint("top.op.repeat",  
+  IndexedCoverPoint("top.op.repeat",  
     xf = lambda operation, ok : operation.repeat, 
     rel = lambda _val, _range : _range[0] <= _val <= _range[1],
-    bins = [(1,3), (4,7), (8,11), (12,15), (16,23), (24,31)]
+    bins = [(1,3), (4,7), (8,11), (12,15), (16,23), (24,31)],
+    domain = range(1,32)
   ),  
-  CoverPoint("top.op.divider",  
+  IndexedCoverPoint("top.op.divider",  
     xf = lambda operation, ok : operation.divider, 
     rel = lambda _val, _range : _range[0] <= _val <= _range[1],
-    bins = [(1,3), (4,7), (8,11), (12,15), (16,23), (24,31)]
+    bins = [(1,3), (4,7), (8,11), (12,15), (16,23), (24,31)],
+    domain = range(1,32)
   ),
   CoverCross("top.op.cross", 
     items = ["top.op.direction", "top.op.repeat", "top.op.divider"]
@@ -91,17 +98,32 @@ OperationsCoverage = coverage_section(
 #Operations order coverage: check if performed two operations
 #in a defined order e.g. read then write
 OperationsOrderCoverage = coverage_section(
-  CoverPoint("top.op.direction_order",  
+  IndexedCoverPoint("top.op.direction_order",  
     xf = lambda prev_operation, operation : 
       (prev_operation.direction, operation.direction),
     bins = [("read", "read"), ("read", "write"), 
       ("write", "read"), ("write", "write")
     ]
   ),
-  CoverPoint("top.op.repeat_order",  
+  IndexedCoverPoint("top.op.repeat_order",  
     xf = lambda prev_operation, operation : 
       prev_operation.repeat - operation.repeat,
     rel = lambda _val, _range : _range[0] <= _val <= _range[1],
-    bins = [(0, 0), (-7, -1), (1, 7)]
+    bins = [(0, 0), (-7, -1), (1, 7)], domain = range(-30,31)
   )
 )
+
+#clear the hits of all cover items under the given one (e.g. to start an 
+#independent run in the same simulation)
+def reset_coverage(name="top"):
+    items = [item for (item_name, item) in coverage_db.items()
+      if (item_name == name) or item_name.startswith(name + ".")]
+    #leaves first, then the parents are recomputed from the children
+    items.sort(key=lambda item : -item._name.count("."))
+    for item in items:
+        if hasattr(item, "_hits"):
+            for bin in item._hits:
+                item._hits[bin] = 0
+            item._new_hits = []
+        else:
+            item._coverage = sum(child.coverage for child in item._children)
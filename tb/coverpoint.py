@@ -0,0 +1,167 @@
+"""
+Testbench of the apbi2c controller - indexed cover point
+
+"""
+
+import inspect
+from collections import OrderedDict
+from functools import wraps
+
+from cocotb_coverage.coverage import CoverPoint, coverage_db
+
+#IndexedCoverPoint.__call__ follows the sampling of CoverPoint of this 
+#version of cocotb_coverage (see tests/test_coverpoint.py)
+COCOTB_COVERAGE_VERSION = "1.2.0"
+
+#hits of the bins, keeps the number of bins with at least at_least hits 
+#whoever writes the hits (sampling, reset or loading of the coverage)
+class _Hits(OrderedDict):
+
+    def __init__(self, at_least, hits):
+        self.at_least = at_least
+        self.covered = 0
+        OrderedDict.__init__(self, hits)
+
+    def __setitem__(self, bin, hits):
+        covered = self.get(bin, 0) >= self.at_least
+        OrderedDict.__setitem__(self, bin, hits)
+        self.covered += (hits >= self.at_least) - covered
+
+    #one more hit of the bin (sampling)
+    def hit(self, bin):
+        hits = self[bin] + 1
+        OrderedDict.__setitem__(self, bin, hits)
+        if hits == self.at_least:
+            self.covered += 1
+
+#CoverPoint with a lookup table from sampled value to matching bins
+class IndexedCoverPoint(CoverPoint):
+    '''
+    Indexed CoverPoint
+
+    Drop-in replacement of cocotb_coverage CoverPoint (same bins, labels,
+    names and export), which does not evaluate the relation against every
+    bin at each sample. The matching bins of a value are looked up in a
+    table: equality bins are indexed directly, for a relation function the
+    table entry is computed with the relation on the first occurrence of the
+    value (or upfront for all values of the domain), so the relation must be
+    a pure function. At most cache_size values are stored in the table, other
+    values are matched against all bins as in CoverPoint.
+    '''
+
+    def __new__(cls, name, *args, domain=None, cache_size=4096, **kwargs):
+        return CoverPoint.__new__(cls, name, *args, **kwargs)
+
+    def __init__(self, name, vname=None, xf=None, rel=None, bins=[],
+                 bins_labels=None, weight=1, at_least=1, inj=True,
+                 domain=None, cache_size=4096):
+        if name in coverage_db:
+            return
+        CoverPoint.__init__(self, name, vname, xf, rel, bins, bins_labels,
+          weight, at_least, inj)
+        self._hits = _Hits(at_least, self._hits)
+        self._cache_size = cache_size
+        self._index = {}
+        if rel is None:
+            for bin in self._hits:
+                self._index[bin] = (bin,)
+        if domain is not None:
+            for value in domain:
+                self._lookup(value)
+
+    #bins matching the value, the relation is evaluated only if the value
+    #is not in the table yet
+    def _lookup(self, value):
+        try:
+            return self._index[value]
+        except KeyError:
+            pass
+        except TypeError: #unhashable
+            return self._match(value)
+        if len(self._index) >= self._cache_size:
+            return self._match(value)
+        matched = self._match(value)
+        self._index[value] = matched
+        return matched
+
+    def _match(self, value):
+        matched = []
+        for bin in self._hits:
+            if self._relation(value, bin):
+                matched.append(bin)
+                if self._injection:
+                    break
+        return tuple(matched)
+
+    def __call__(self, f):
+        @wraps(f)
+        def _wrapped_function(*cb_args, **cb_kwargs):
+
+            if len(cb_kwargs) > 0:
+                raise Exception("Use of keyword args in sampling function call is not supported.")
+
+            # if transformation function not defined, simply return arguments
+            if self._transformation is None:
+                if self._vname is None:
+                    def dummy_f(*cb_args):
+                        if len(cb_args) > 1:
+                            return cb_args
+                        else:
+                            return cb_args[0]
+                else:
+                    arg_names = list(inspect.signature(f).parameters)
+                    idx = arg_names.index(self._vname)
+
+                    def dummy_f(*cb_args):
+                        return cb_args[idx]
+
+                self._transformation = dummy_f
+
+            # for the first time only check if decorates method in the class
+            if self._decorates_method is None:
+                self._decorates_method = False
+                for x in inspect.getmembers(cb_args[0]):
+                    if '__func__' in dir(x[1]):
+                        self._decorates_method = \
+                            f.__name__ == x[1].__func__.__name__
+                        if self._decorates_method:
+                            break
+
+            # for the first time only check if a transformation function is a
+            # method
+            if self._trans_is_method is None:
+                self._trans_is_method = "self" in inspect.signature(
+                    self._transformation).parameters
+
+            current_coverage = self.coverage
+            self._new_hits = []
+
+            if self._decorates_method ^ self._trans_is_method:
+                result = self._transformation(*cb_args[1:])
+            else:
+                result = self._transformation(*cb_args)
+
+            for bin in self._lookup(result):
+                self._hits.hit(bin)
+                if self._bins_labels is not None:
+                    self._new_hits.append(self._labels_bins[bin])
+                else:
+                    self._new_hits.append(bin)
+                if bin in self._bins_callbacks:
+                    self._bins_callbacks[bin]()
+
+            coverage = self.coverage
+            if coverage != current_coverage:
+                self._parent._update_coverage(coverage - current_coverage)
+
+                for ii in self._threshold_callbacks:
+                    if (ii > 100 * current_coverage / self.size
+                            and ii <= 100 * coverage / self.size):
+                        self._threshold_callbacks[ii]()
+
+            return f(*cb_args, **cb_kwargs)
+        return _wrapped_function
+
+    @property
+    def coverage(self):
+        return self._weight * self._hits.covered
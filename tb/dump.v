@@ -0,0 +1,12 @@
+// Testbench of the apbi2c controller - waveform dump of the i2c toplevel 
+// (see DUMP_FILE in Makefile), the file name is given by the +dumpfile 
+// plusarg
+module dump();
+reg [8*1024-1:0] dumpfile;
+initial begin
+    if (!$value$plusargs("dumpfile=%s", dumpfile))
+        dumpfile = "dump.fst";
+    $dumpfile(dumpfile);
+    $dumpvars(0, i2c);
+end
+endmodule
@@ -31,13 +31,19 @@ Testbench of the apbi2c controller - I2C Transaction and Driver + Monitor
 """
 
 import random
+from collections import namedtuple
+
 import cocotb
-from cocotb.triggers import RisingEdge, ReadOnly
+from cocotb.triggers import RisingEdge, ReadOnly, Timer, Edge, First
+from cocotb.utils import get_sim_time
 from cocotb_bus.drivers import BusDriver
 from cocotb_bus.monitors import BusMonitor
 
 from cocotb_coverage.crv import Randomized
 
+from profiling import WakeupCounter
+from sampling import Sampler
+
 #I2C Transaction object
 class I2CTransaction(Randomized):
 
@@ -57,102 +63,242 @@ class I2CTransaction(Randomized):
     def __eq__(self, other):
         return self.data == other.data
 
+#I2C Monitor record - lightweight immutable object, compares as 
+#I2CTransaction (data match only)
+class I2CRecord(namedtuple("I2CRecord", ["data", "write"])):
+    __slots__ = ()
+    
+    def __ne__(self, other):
+        return self.data != other.data
+        
+    def __eq__(self, other):
+        return self.data == other.data
+        
+    #equal records hash equal
+    def __hash__(self):
+        return hash(self.data)
+
 #I2C MONITOR - Observe interface to monitor all transactions
-class I2CMonitor(BusMonitor):
+class I2CMonitor(BusMonitor, WakeupCounter):
     '''
     I2C Monitor
     '''
     _signals = ["SDA", "SCL"]
 
-    def __init__(self, entity, name, clock):
+    def __init__(self, entity, name, clock, edge_driven=True):
+        #edge driven monitor wakes up on SDA/SCL changes only, otherwise 
+        #the bus is sampled at every clock edge
+        self.edge_driven = edge_driven
+        self._started = False
+        self._pre_started = False
+        self._prev_scl = 1
+        #number of SCL changes observed (bus activity)
+        self.scl_edges = 0
+        self._scl = None
         BusMonitor.__init__(self, entity, name, clock)
         self.clock = clock
+        self.sampler = Sampler(self.bus, self._signals, "i2c")
+        self._sample_bus = self.sampler.reader("SCL", "SDA")
         
     async def _monitor_recv(self):
-        started = False
-        pre_started = False
-        prev_scl = 1
+        if self.edge_driven:
+            await self._monitor_recv_edges()
+        else:
+            await self._monitor_recv_cycles()
+            
+    async def _monitor_recv_cycles(self):
+        while True:
+            await self._wait(RisingEdge(self.clock))
+            await self._wait(ReadOnly())
+            self._sample()
+            
+    #SDA and SCL are driven synchronously to the clock, so decoding the bus 
+    #state at each change gives the same result as sampling every clock edge,
+    #provided the unchanged state is decoded once more if clock edges passed 
+    #since the previous change (the decoding is idempotent after that, e.g.
+    #a word received with SCL and SDA high is followed by a start condition)
+    async def _monitor_recv_edges(self):
+        sda, scl = self.bus.SDA, self.bus.SCL
+        #clock period, the bus is idle during the measurement
+        await self._wait(RisingEdge(self.clock))
+        start = get_sim_time()
+        await self._wait(RisingEdge(self.clock))
+        period = get_sim_time() - start
+        await self._wait(ReadOnly())
+        self._sample()
+        last = get_sim_time()
         while True:
-            await RisingEdge(self.clock)
-            await ReadOnly()
-            try:
-                sda = 0 if self.bus.SDA == 'x' else int(self.bus.SDA)
-            except ValueError:
-                sda = 0
-            if (self.bus.SCL == 1):
-                #start bit
-                if (not started) & (not pre_started) & (sda == 1):
-                    pre_started = True
-                elif (not started) & pre_started & (sda == 0):
-                    started = True
-                    pre_started = False
-                    rdata = 0
-                    data_cnt = 0
-                    ack = 1
-                #sample data at SCL
-                elif started & (prev_scl == 0):
-                    prev_scl = 1
-                    if data_cnt == 32:
-                        started = False
-                        xaction = I2CTransaction(rdata, write=False)
-                        self._recv(xaction)
-                    elif (data_cnt%8 != 0) | ack:
-                        ack = 0
-                        rdata = rdata + (sda << data_cnt)
-                        data_cnt += 1
-                    else: #ack state
-                        ack = 1
-            elif started:
-                prev_scl = 0
+            await self._wait(First(Edge(sda), Edge(scl)))
+            await self._wait(ReadOnly())
+            now = get_sim_time()
+            if now - last > period:
+                self._decode(*self._last_sample)
+            self._sample()
+            last = now
+            
+    #X or Z on SDA (counted by the sampler) is decoded as 0
+    def _sample(self):
+        scl, sda = self._sample_bus()
+        self._last_sample = (scl == 1, 0 if sda is None else sda)
+        self._decode(*self._last_sample)
+            
+    #I2C framing: start bit, then 32 data bits with ACK after each byte
+    def _decode(self, scl, sda):
+        if scl != self._scl:
+            self._scl = scl
+            self.scl_edges += 1
+        if scl:
+            #start bit
+            if (not self._started) & (not self._pre_started) & (sda == 1):
+                self._pre_started = True
+            elif (not self._started) & self._pre_started & (sda == 0):
+                self._started = True
+                self._pre_started = False
+                self._rdata = 0
+                self._data_cnt = 0
+                self._ack = 1
+            #sample data at SCL
+            elif self._started & (self._prev_scl == 0):
+                self._prev_scl = 1
+                if self._data_cnt == 32:
+                    self._started = False
+                    self._recv(I2CRecord(self._rdata, False))
+                elif (self._data_cnt%8 != 0) | self._ack:
+                    self._ack = 0
+                    self._rdata = self._rdata + (sda << self._data_cnt)
+                    self._data_cnt += 1
+                else: #ack state
+                    self._ack = 1
+        elif self._started:
+            self._prev_scl = 0
                 
+#I2C bus waveform of a single word (as driven by I2CDriver) - list of 
+#(offset, SCL, SDA) events, offset counted in clock rising edges from the 
+#start of the word, None means that the signal is not driven at that edge
+def i2c_waveform(data, divider):
+    wave = [(0, 1, 1)]
+    cycle = 2*divider
+    wave.append((cycle, None, 0))
+    for i in range(32):
+        cycle += 1
+        wave.append((cycle, 0, None))
+        cycle += divider
+        if (i%8==0) and (i > 0):
+            wave.append((cycle, 1, None))
+            cycle += 1
+            wave.append((cycle, 0, None))
+            cycle += divider
+        wave.append((cycle, 1, (data >> i) & 0x01))
+    cycle += 1
+    wave.append((cycle, 0, None))
+    cycle += divider
+    wave.append((cycle, 1, None))
+    cycle += 1
+    wave.append((cycle, 0, None))
+    cycle += divider
+    wave.append((cycle, 1, 0))
+    cycle += 1
+    wave.append((cycle, None, 1))
+    return wave
+
 #I2C DRIVER: send I2C transaction via interface
-class I2CDriver(BusDriver):
+class I2CDriver(BusDriver, WakeupCounter):
     '''
     I2C Driver
     '''
     _signals = ["SDA", "SCL"]
 
-    def __init__(self, entity, name, clock):
+    def __init__(self, entity, name, clock, fast=True):
         BusDriver.__init__(self, entity, name, clock)
         self.clock = clock
+        #fast mode waits the gaps between waveform events in single 
+        #triggers instead of counting every clock edge
+        self.fast = fast
+        self._period = 0
         self.bus.SDA.setimmediatevalue(1)
         self.bus.SCL.setimmediatevalue(1)
         
     async def drive_high(self):
-        await RisingEdge(self.clock)
+        await self._wait(RisingEdge(self.clock))
         self.bus.SCL.value = 1
         self.bus.SDA.value = 1
         
     async def send(self, transaction):
+        if self.fast:
+            await self._send_waveform(transaction)
+        else:
+            await self._send_per_cycle(transaction)
+        
+    #fast mode: drive precomputed waveform events, skipping the clock 
+    #edges between them
+    async def _send_waveform(self, transaction):
+        cycle = 0
+        for (offset, scl, sda) in i2c_waveform(
+          transaction.data, transaction.divider):
+            if offset > cycle:
+                if cycle == 0:
+                    await self._sync_edges(offset)
+                else:
+                    await self._skip_edges(offset - cycle)
+                cycle = offset
+            if scl is not None:
+                self.bus.SCL.value = scl
+            if sda is not None:
+                self.bus.SDA.value = sda
+        
+    #wait for the first clock edges of the word, measure the clock period 
+    #if not known yet
+    async def _sync_edges(self, edges):
+        await self._wait(RisingEdge(self.clock))
+        edges -= 1
+        if (not self._period) and (edges > 0):
+            start = get_sim_time()
+            await self._wait(RisingEdge(self.clock))
+            self._period = get_sim_time() - start
+            edges -= 1
+        await self._skip_edges(edges)
+        
+    #wait a number of clock edges, starting at a rising edge - the clock is 
+    #assumed free-running, so sleep until the middle of the last period and 
+    #synchronize on its rising edge
+    async def _skip_edges(self, edges):
+        if (edges > 1) and (self._period > 1):
+            await self._wait(Timer((edges-1)*self._period + self._period//2))
+            edges = 1
+        for i in range(edges):
+            await self._wait(RisingEdge(self.clock))
+        
+    #reference mode: wait for every single clock edge
+    async def _send_per_cycle(self, transaction):
         self.bus.SCL.value = 1
         self.bus.SDA.value = 1
         for i in range(2*transaction.divider):
-            await RisingEdge(self.clock)
+            await self._wait(RisingEdge(self.clock))
         self.bus.SDA.value = 0
         for i in range(32):
-            await RisingEdge(self.clock)
+            await self._wait(RisingEdge(self.clock))
             self.bus.SCL.value = 0
             for j in range(transaction.divider):
-                await RisingEdge(self.clock)
+                await self._wait(RisingEdge(self.clock))
             if (i%8==0) and (i > 0):
                 self.bus.SCL.value = 1
-                await RisingEdge(self.clock)
+                await self._wait(RisingEdge(self.clock))
                 self.bus.SCL.value = 0
                 for j in range(transaction.divider):
-                    await RisingEdge(self.clock)
+                    await self._wait(RisingEdge(self.clock))
             self.bus.SCL.value = 1
             self.bus.SDA.value = (transaction.data >> i) & 0x01
-        await RisingEdge(self.clock)
+        await self._wait(RisingEdge(self.clock))
         self.bus.SCL.value = 0
         for j in range(transaction.divider):
-            await RisingEdge(self.clock)
+            await self._wait(RisingEdge(self.clock))
         self.bus.SCL.value = 1
-        await RisingEdge(self.clock)
+        await self._wait(RisingEdge(self.clock))
         self.bus.SCL.value = 0
         for j in range(transaction.divider):
-            await RisingEdge(self.clock)
+            await self._wait(RisingEdge(self.clock))
         self.bus.SCL.value = 1
         self.bus.SDA.value = 0
-        await RisingEdge(self.clock)
+        await self._wait(RisingEdge(self.clock))
         self.bus.SDA.value = 1
             
@@ -0,0 +1,288 @@
+"""
+Testbench of the apbi2c controller - simulator stand-in for benchmarks
+
+Event-driven model of the simulator kernel, only what the testbench agents
+need: free-running clock, signals of a flat entity and the RisingEdge, Edge,
+ReadOnly, Timer and First triggers. Time is counted in steps, each signal 
+write is visible immediately and wakes the tasks waiting for its change.
+Awaiting any other trigger (e.g. the Event of the cocotb_bus drivers send 
+queue) parks the task forever.
+
+"""
+
+import heapq
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+import cocotb
+from cocotb.binary import BinaryValue
+
+#Triggers - await returns the fired trigger (the fired one of a First)
+class _Trigger(object):
+    def __await__(self):
+        return (yield self)
+
+class RisingEdge(_Trigger):
+    def __init__(self, signal):
+        self.signal = signal
+    def _prime(self, sim, task, token):
+        self.signal._rise.append((task, token, self))
+        if self.signal is sim.clock:
+            sim._schedule_clock()
+
+class Edge(_Trigger):
+    def __init__(self, signal):
+        self.signal = signal
+    def _prime(self, sim, task, token):
+        self.signal._change.append((task, token, self))
+
+class ReadOnly(_Trigger):
+    def _prime(self, sim, task, token):
+        sim._readonly.append((task, token, self))
+
+class Timer(_Trigger):
+    def __init__(self, time, units="step"):
+        self.time = time
+    def _prime(self, sim, task, token):
+        sim._push(sim.now + self.time, (task, token, self))
+
+class First(_Trigger):
+    def __init__(self, *triggers):
+        self.triggers = triggers
+    def _prime(self, sim, task, token):
+        for trigger in self.triggers:
+            trigger._prime(sim, task, token)
+
+#Signal (handle) of the mock entity
+class MockSignal(object):
+
+    def __init__(self, sim, name, value=0):
+        self._sim = sim
+        self._name = name
+        self._value = value
+        #(task, token, trigger) waiting for rising edge / any change
+        self._rise = []
+        self._change = []
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._sim._write(self, value)
+
+    def setimmediatevalue(self, value):
+        self._sim._write(self, value)
+
+    def __eq__(self, other):
+        return self._value == other
+
+    def __ne__(self, other):
+        return self._value != other
+
+    __hash__ = object.__hash__
+
+    def __int__(self):
+        return int(self._value)
+
+    def __repr__(self):
+        return "%s(%r)" % (self._name, self._value)
+
+#Signal read as a cocotb handle - the value is a BinaryValue built from the 
+#binary string at each access, which accounts for the cost of the real 
+#handles
+class MockBinarySignal(MockSignal):
+
+    @property
+    def value(self):
+        binstr = format(self._value, "b") if isinstance(self._value, int) \
+          else str(self._value)
+        return BinaryValue(binstr, len(binstr))
+
+    @value.setter
+    def value(self, value):
+        self._sim._write(self, value)
+
+    def __eq__(self, other):
+        return self.value == other
+
+    def __ne__(self, other):
+        return self.value != other
+
+    __hash__ = object.__hash__
+
+    def __int__(self):
+        return int(self.value)
+
+#Free running clock, the value is derived from the simulation time
+class MockClock(MockSignal):
+
+    @property
+    def value(self):
+        return 1 if (self._sim.now % self._sim.period) < self._sim.period//2 \
+          else 0
+
+    def __eq__(self, other):
+        return self.value == other
+
+    def __ne__(self, other):
+        return self.value != other
+
+    __hash__ = object.__hash__
+
+    def __int__(self):
+        return self.value
+
+#DUT stand-in: flat entity with the signals as attributes
+class MockEntity(object):
+
+    def __init__(self, sim, signals):
+        self._name = "mock"
+        self._log = logging.getLogger("cocotb.mock")
+        for name, value in signals.items():
+            setattr(self, name, sim.signal(name, value))
+
+#Simulator kernel
+class MockSim(object):
+    '''
+    Mock Simulator
+
+    Runs the coroutines started with start_soon() (also the ones started by
+    the cocotb_bus agents, see patched()) until no event is pending. At each 
+    time step the tasks woken by the clock or a timer are run, then the tasks
+    woken by signal changes, then the ReadOnly waiters. Counts the trigger 
+    waits of all tasks (triggers). Signal changes are recorded in the trace 
+    list if enabled. With binary set, the signals are read as cocotb handles
+    (see MockBinarySignal).
+    '''
+
+    def __init__(self, period=1000, trace=False, binary=False):
+        self.period = period
+        self.binary = binary
+        self.now = 0
+        self.triggers = 0
+        self.parked = 0
+        self.trace = [] if trace else None
+        self.clock = MockClock(self, "CLK")
+        self._events = []
+        self._seq = 0
+        self._clock_pending = False
+        self._active = deque()
+        self._readonly = []
+
+    def signal(self, name, value=0):
+        if self.binary:
+            return MockBinarySignal(self, name, value)
+        return MockSignal(self, name, value)
+
+    def start_soon(self, coro):
+        self._active.append((coro, None))
+        return coro
+
+    def get_sim_time(self, units="step"):
+        return self.now
+
+    #replace the cocotb triggers and scheduler functions in the given 
+    #modules (the ones imported by name) and in the cocotb package
+    @contextmanager
+    def patched(self, *modules):
+        replacements = {
+          "RisingEdge": RisingEdge, "Edge": Edge, "ReadOnly": ReadOnly,
+          "Timer": Timer, "First": First, "get_sim_time": self.get_sim_time,
+          "start_soon": self.start_soon
+        }
+        saved = []
+        for module in (cocotb,) + modules:
+            for name, value in replacements.items():
+                if hasattr(module, name):
+                    saved.append((module, name, getattr(module, name)))
+                    setattr(module, name, value)
+        try:
+            yield self
+        finally:
+            for module, name, value in reversed(saved):
+                setattr(module, name, value)
+
+    #run the started tasks until the given coroutine completes (its result 
+    #is returned), or until the given time or until nothing is pending
+    def run(self, coro=None, until=None):
+        result = []
+        if coro is not None:
+            async def _main():
+                result.append(await coro)
+            self.start_soon(_main())
+        self._settle()
+        while self._events and not ((coro is not None) and result):
+            now = self._events[0][0]
+            if (until is not None) and (now > until):
+                break
+            self.now = now
+            while self._events and (self._events[0][0] == now):
+                entry = heapq.heappop(self._events)[2]
+                if entry is None:
+                    self._clock_pending = False
+                    waiters = self.clock._rise
+                    self.clock._rise = []
+                    self._fire(waiters)
+                else:
+                    self._fire((entry,))
+            self._settle()
+        if until is not None:
+            self.now = max(self.now, until)
+        return result[0] if result else None
+
+    def _push(self, time, entry):
+        self._seq += 1
+        heapq.heappush(self._events, (time, self._seq, entry))
+
+    #the clock edge is scheduled only if some task waits for it
+    def _schedule_clock(self):
+        if not self._clock_pending:
+            self._clock_pending = True
+            self._push((self.now//self.period + 1)*self.period, None)
+
+    def _write(self, signal, value):
+        if value == signal._value:
+            return
+        signal._value = value
+        if self.trace is not None:
+            self.trace.append((self.now, signal._name, value))
+        if signal._change:
+            waiters = signal._change
+            signal._change = []
+            self._fire(waiters)
+        if signal._rise and (value == 1):
+            waiters = signal._rise
+            signal._rise = []
+            self._fire(waiters)
+
+    #the token is shared by the triggers of a First, only the first fired 
+    #one wakes the task
+    def _fire(self, waiters):
+        for task, token, trigger in waiters:
+            if not token[0]:
+                token[0] = True
+                self._active.append((task, trigger))
+
+    def _settle(self):
+        while True:
+            while self._active:
+                self._resume(*self._active.popleft())
+            if not self._readonly:
+                return
+            waiters = self._readonly
+            self._readonly = []
+            self._fire(waiters)
+
+    def _resume(self, task, value):
+        try:
+            trigger = task.send(value)
+        except StopIteration:
+            return
+        self.triggers += 1
+        if isinstance(trigger, _Trigger):
+            trigger._prime(self, task, [False])
+        else:
+            self.parked += 1
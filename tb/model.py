@@ -0,0 +1,400 @@
+"""
+Testbench of the apbi2c controller - transaction-level model
+
+Reference model of the controller registers, FIFOs and I2C framing. In the
+RTL test it predicts the I2C words sent out from the observed APB transfers
+(expected items of the scoreboard). Standalone, it runs the test sequences 
+of test_tree at transaction level with the same coverage sections, 
+operation generator and sequence stimulus (background APB traffic, read 
+lag and RX FIFO underflow reads), to plan the coverage closure without a 
+simulator.
+
+    python model.py --target 90 --plan model_plan.json
+
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import deque
+
+from apb import APBTransaction, APBRecord
+from coverage import *
+from i2c import I2CRecord, i2c_waveform
+from operations import OperationGenerator, StimulusPlan
+
+#assumed FIFOs depth (operations of up to 31 words fill the TX FIFO)
+FIFO_DEPTH = 32
+
+#probability of reading the empty RX FIFO (instead of waiting for the next
+#word) during read operations
+RX_UNDERFLOW_RATE = 0.1
+
+#stimulus of a round of the background APB traffic (segment_apb_rw of 
+#test_tree) drawn from its random generator: the written data, the delays 
+#of the write and of the read back and the clock cycles to wait after them
+def apb_rw_round(rng):
+    return (rng.randint(0,0xFFFFFFFF), rng.randint(0,9), rng.randint(0,9), 
+      rng.randint(1,16))
+
+#APB register map
+REG_TX = 0
+REG_RX = 4
+REG_CONFIG = 8
+REG_TIMEOUT = 12
+
+#clock cycles of a single I2C word
+def i2c_word_cycles(divider):
+    return i2c_waveform(0, divider)[-1][0] + 1
+
+#Transaction-level model of the controller
+class APBI2CModel(object):
+    '''
+    APBI2C Model
+
+    APB registers: 0 - TX FIFO (write), 4 - RX FIFO (read), 8 - configuration
+    (bit 0 transmit, bit 1 receive, clock divider from bit 2), 12 - timeout
+    (read back as written). Words in the TX FIFO are sent out one after 
+    another while transmit is enabled, the callbacks get the I2CRecord of 
+    each word when it starts to be sent. Words received on I2C while receive
+    is enabled are queued in the RX FIFO. Words written to a full FIFO are 
+    dropped and counted as overflows. Time is counted in clock cycles.
+    '''
+
+    def __init__(self, fifo_depth=FIFO_DEPTH):
+        self.fifo_depth = fifo_depth
+        self._callbacks = []
+        self.reset()
+
+    def reset(self):
+        #(data, cycle when written)
+        self.tx_fifo = deque()
+        self.rx_fifo = deque()
+        self.config = 0
+        self.timeout = 0
+        self.cycle = 0
+        self.overflows = 0
+        #cycle when the I2C word being sent is finished
+        self._tx_free = 0
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    @property
+    def transmit(self):
+        return bool(self.config & 0x1)
+
+    @property
+    def receive(self):
+        return bool(self.config & 0x2)
+
+    @property
+    def divider(self):
+        return self.config >> 2
+
+    #send out the TX FIFO words started until the given cycle (None - all)
+    def _advance(self, cycle=None):
+        while self.transmit and self.tx_fifo:
+            data, written = self.tx_fifo[0]
+            start = max(self._tx_free, written)
+            if (cycle is not None) and (start > cycle):
+                break
+            self.tx_fifo.popleft()
+            self._tx_free = start + i2c_word_cycles(self.divider)
+            for callback in self._callbacks:
+                callback(I2CRecord(data, True))
+
+    def apb_write(self, addr, data):
+        self._advance(self.cycle)
+        if addr == REG_TX:
+            if len(self.tx_fifo) == self.fifo_depth:
+                self.overflows += 1
+            else:
+                self.tx_fifo.append((data, self.cycle))
+        elif addr == REG_CONFIG:
+            self.config = data
+        elif addr == REG_TIMEOUT:
+            self.timeout = data
+        self._advance(self.cycle)
+
+    #read data, None if not defined (e.g. empty RX FIFO)
+    def apb_read(self, addr):
+        self._advance(self.cycle)
+        if addr == REG_RX:
+            return self.rx_fifo.popleft() if self.rx_fifo else None
+        elif addr == REG_CONFIG:
+            return self.config
+        elif addr == REG_TIMEOUT:
+            return self.timeout
+        return None
+
+    def i2c_receive(self, data):
+        if not self.receive:
+            return
+        if len(self.rx_fifo) == self.fifo_depth:
+            self.overflows += 1
+        else:
+            self.rx_fifo.append(data)
+
+    #cycle when the TX FIFO gets empty and the last word is sent out
+    def tx_done(self):
+        self._advance()
+        return max(self.cycle, self._tx_free)
+
+    #predictor: APB transfer observed by the monitor (APBRecord), the words
+    #written to the TX FIFO are sent out immediately
+    def observe_apb(self, xaction):
+        if xaction.write:
+            self.apb_write(xaction.addr, xaction.data)
+            self._advance()
+        else:
+            self.apb_read(xaction.addr)
+
+    def snapshot(self):
+        return (tuple(self.tx_fifo), tuple(self.rx_fifo), self.config, 
+          self.timeout, self.cycle, self.overflows, self._tx_free)
+
+    def restore(self, state):
+        (tx_fifo, rx_fifo, self.config, self.timeout, self.cycle, 
+          self.overflows, self._tx_free) = state
+        self.tx_fifo = deque(tx_fifo)
+        self.rx_fifo = deque(rx_fifo)
+
+#Test sequences of test_tree executed on the model
+class ModelSequences(object):
+    '''
+    Model Sequences
+
+    Stimulus and checking of the test_tree sequences at transaction level.
+    APB transfers are timed as driven by APBSlave (without wait states), 
+    the APB callbacks get the APBRecord of each transfer as from the APB 
+    monitor, the I2C callbacks get the I2CRecord of each word on the bus.
+    The background APB traffic (started with start_apb_rw()) runs while the
+    operations wait, its rounds are started in the idle cycles of the bus.
+    The global random module is used as in test_tree (the read lag and the
+    underflow reads).
+    '''
+
+    def __init__(self, model):
+        self.model = model
+        self.apb_callbacks = []
+        self.i2c_callbacks = []
+        model.add_callback(self._i2c)
+        #clock edge of the last APB transfer
+        self._last_edge = 0
+        #random generator, transactions and start cycle of the next round 
+        #of the background traffic (None if not running)
+        self._apb_rw = None
+
+    def _i2c(self, xaction):
+        for callback in self.i2c_callbacks:
+            callback(xaction)
+
+    def _transfer(self, addr, data, write, edge):
+        self.model.cycle = edge
+        if write:
+            self.model.apb_write(addr, data)
+        else:
+            data = self.model.apb_read(addr)
+        record = APBRecord(addr, data, write, edge - self._last_edge - 1)
+        self._last_edge = edge
+        for callback in self.apb_callbacks:
+            callback(record)
+        return data
+
+    #APBSlave.send: setup and access phase, then transaction delay
+    def send(self, transaction):
+        start = self.model.cycle
+        data = self._transfer(transaction.addr, transaction.data, 
+          transaction.write, start + 2)
+        self.model.cycle = start + 3 + transaction.delay
+        return data
+
+    #APBSlave.send_many: back-to-back transfers
+    def send_many(self, transactions):
+        edge = self.model.cycle + 2
+        rvals = []
+        for transaction in transactions:
+            rvals.append(self._transfer(transaction.addr, transaction.data,
+              transaction.write, edge))
+            edge += 2
+        self.model.cycle = edge - 1
+        return rvals
+
+    def config_write(self, addr, data):
+        xaction = APBTransaction(addr, data, write=True)
+        xaction.randomize()
+        self.send(xaction)
+
+    #wait until the cycle, the rounds of the background traffic started 
+    #meanwhile are executed
+    def _wait_until(self, cycle):
+        if self._apb_rw is not None:
+            rng, xaction_wr, xaction_rd, start = self._apb_rw
+            while start < cycle:
+                self.model.cycle = max(self.model.cycle, start)
+                xaction_wr.data, xaction_wr.delay, xaction_rd.delay, gap = \
+                  apb_rw_round(rng)
+                self.send(xaction_wr)
+                self.send(xaction_rd)
+                start = self.model.cycle + gap
+            self._apb_rw[3] = start
+        self.model.cycle = max(self.model.cycle, cycle)
+
+    #segment_apb_rw, rounds drawn from rng until stop_apb_rw()
+    def start_apb_rw(self, rng, addr=REG_TIMEOUT):
+        self._apb_rw = [rng, APBTransaction(addr, 0, write=True),
+          APBTransaction(addr, 0, write=False), self.model.cycle]
+
+    #the round in progress is finished (with its wait)
+    def stop_apb_rw(self):
+        self._wait_until(self.model.cycle)
+        self.model.cycle = max(self.model.cycle, self._apb_rw[3])
+        self._apb_rw = None
+
+    #returns True if the words are sent out as written
+    def write_operation(self, operation):
+        self.config_write(REG_CONFIG, 0x0001 | (operation.divider << 2))
+        sent = []
+        self.model.add_callback(sent.append)
+        words = [APBTransaction(REG_TX, data, write=True) 
+          for data in operation.words]
+        self.send_many(words)
+        self._wait_until(self.model.tx_done())
+        self.model.remove_callback(sent.append)
+        return [xaction.data for xaction in sent] == \
+          [xaction.data for xaction in words]
+
+    #returns True if the words read from the RX FIFO are the received ones,
+    #the words are sent on I2C back to back (producer), the reads (consumer)
+    #start after a random number of words and sometimes read the empty FIFO
+    #(underflow, data not checked)
+    def read_operation(self, operation):
+        self.config_write(REG_CONFIG, 0x0002 | (operation.divider << 2))
+        words = list(operation.words)
+        cycle = self.model.cycle
+        arrivals = []
+        for data in words:
+            cycle += i2c_word_cycles(operation.divider)
+            arrivals.append(cycle)
+        received = 0
+        #the words sent out until the current cycle are received
+        def receive():
+            nonlocal received
+            while (received < len(words)) and \
+              (arrivals[received] <= self.model.cycle):
+                self._i2c(I2CRecord(words[received], True))
+                self.model.i2c_receive(words[received])
+                received += 1
+        ok = True
+        apb_xaction = APBTransaction(REG_RX, 0, write=False)
+        lag = random.randint(0, operation.repeat)
+        if lag:
+            self._wait_until(arrivals[lag - 1])
+        for i in range(operation.repeat):
+            receive()
+            while received == i:
+                if random.random() < RX_UNDERFLOW_RATE:
+                    apb_xaction.randomize()
+                    self.send(apb_xaction)
+                else:
+                    self._wait_until(arrivals[i])
+                receive()
+            apb_xaction.randomize()
+            if self.send(apb_xaction) != words[i]:
+                ok = False
+        self._wait_until(arrivals[-1])
+        receive()
+        return ok
+
+#coverage closure of the test_tree loop on the model, returns the list of 
+#executed operations (direction, repeat, divider, start and end cycle, ok),
+#the random generators are seeded as for a seed of test_tree
+def plan_closure(target=90, max_operations=10000, seed=None, log=print):
+    if seed is None:
+        seed = random.getrandbits(32)
+    random.seed(seed)
+    apb_rw_random = random.Random("%d.apb_rw" % seed)
+    model = APBI2CModel()
+    sequences = ModelSequences(model)
+
+    @APBCoverage
+    def apb_xaction_catcher(apb_xaction):
+        pass
+
+    @I2CCoverage
+    def i2c_xaction_catcher(i2c_xaction):
+        pass
+
+    sequences.apb_callbacks.append(apb_xaction_catcher)
+    sequences.i2c_callbacks.append(i2c_xaction_catcher)
+
+    @OperationsOrderCoverage
+    def sample_operations_order_coverage(prev_operation, operation):
+        pass
+
+    @OperationsCoverage
+    def sample_operation(operation, ok):
+        pass
+
+    sequences.config_write(REG_TIMEOUT, 0x0100)
+    op_generator = OperationGenerator(plan=StimulusPlan(seed))
+    apb_cover_item = coverage_db["top.apb.writeXdelay"]
+    top_cover_item = coverage_db["top"]
+    plan = []
+    prev_operation = None
+    cov_op = 0
+    while (cov_op < target) and (len(plan) < max_operations):
+        operation = op_generator.next(prev_operation)
+        start = model.cycle
+        #background traffic as long as apb.writeXdelay is not covered
+        apb_rw_enabled = \
+          apb_cover_item.coverage*100/apb_cover_item.size < 100
+        if apb_rw_enabled:
+            sequences.start_apb_rw(apb_rw_random)
+        if operation.direction == "read":
+            ok = sequences.read_operation(operation)
+        else:
+            ok = sequences.write_operation(operation)
+        if apb_rw_enabled:
+            sequences.stop_apb_rw()
+        sample_operation(operation, ok)
+        if prev_operation is not None:
+            sample_operations_order_coverage(prev_operation, operation)
+        prev_operation = operation
+        plan.append({
+          "direction": operation.direction, "repeat": operation.repeat,
+          "divider": operation.divider, "start_cycle": start,
+          "end_cycle": model.cycle, "ok": ok
+        })
+        cov_op = top_cover_item.coverage*100.0/top_cover_item.size
+    log("%d operations, %d clock cycles, coverage = %.2f %%" % 
+      (len(plan), model.cycle, cov_op))
+    return plan
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+      description="Coverage closure of the apbi2c testbench on the model")
+    parser.add_argument("--target", type=float, default=90.0,
+      help="top coverage (in %%) to stop at")
+    parser.add_argument("--max-operations", type=int, default=10000,
+      help="maximal number of operations")
+    parser.add_argument("--seed", type=int, default=None,
+      help="random seed")
+    parser.add_argument("--plan", default=None,
+      help="file to store the executed operations to (json)")
+    parser.add_argument("--coverage", default="model_coverage.xml",
+      help="coverage report file")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    plan = plan_closure(args.target, args.max_operations, args.seed)
+    print("Closure planned in %.2f s" % (time.perf_counter() - start))
+    coverage_db.report_coverage(print, bins=False)
+    coverage_db.export_to_xml(args.coverage)
+    if args.plan is not None:
+        with open(args.plan, "w") as f:
+            json.dump(plan, f, indent=2)
@@ -0,0 +1,176 @@
+"""
+Testbench of the apbi2c controller - I2C Operation and its generation
+
+"""
+
+import random
+import sys
+from array import array
+from itertools import product
+
+from cocotb_coverage.crv import Randomized
+from cocotb_coverage.coverage import coverage_db
+
+#ranges of the number of words and clock divider (see coverage.py)
+RANGES = [(1,3), (4,7), (8,11), (12,15), (16,23), (24,31)]
+
+#the whole randomization space of I2C_Operation - direction, range of the 
+#number of words and range of the divider (2 x 6 x 6 combinations)
+SPACE = tuple(product(["write", "read"], RANGES, RANGES))
+
+#define "I2C Operation" as a bunch of r/ws with defined number of data 
+#and a specific clock divider
+#this is the main stuff to be tested - we want to know if controller 
+#correctly processes transfers with different directions, amount of 
+#data and SCK period
+class Operation(object):
+    '''
+    I2C Operation
+
+    Plain record of an operation, without random variables. Operations of 
+    the StimulusPlan and the replayed operations are records, only 
+    I2C_Operation objects declare the random variables for the solver.
+    '''
+
+    __slots__ = ("direction", "repeat", "divider", "repeat_range", 
+      "divider_range", "words")
+
+    def __init__(self, direction = 'write', repeat = 1, divider = 1,
+      repeat_range = (1,3), divider_range = (1,3), words = ()):
+        self.direction = direction
+        self.repeat = repeat
+        self.divider = divider
+        self.repeat_range = repeat_range
+        self.divider_range = divider_range
+        #data words of the operation (see StimulusPlan)
+        self.words = words
+
+#randomized operation, for the constraint solver
+class I2C_Operation(Operation, Randomized):
+    def __init__(self, direction = 'write', repeat = 1, divider = 1):
+        Operation.__init__(self, direction, repeat, divider)
+        Randomized.__init__(self)
+        #I2C_Operation objects may be fully randomized
+        self.add_rand("direction",["write", "read"])
+        self.add_rand("repeat_range", RANGES)
+        self.add_rand("divider_range", RANGES)
+    
+    #post_randomize to pick random values from already randomized ranges
+    def post_randomize(self):
+        self.repeat = random.randint(
+          self.repeat_range[0], self.repeat_range[1]
+        )
+        self.divider = random.randint(
+          self.divider_range[0], self.divider_range[1]
+        )
+
+#Plan of the operations stimulus
+class StimulusPlan(object):
+    '''
+    Stimulus Plan
+
+    Operations are picked from the enumerated randomization space (SPACE)
+    without the constraint solver, the data words of an operation are 
+    generated at once as an array of 32-bit integers. The plan has its own 
+    random generator, so the same seed gives the same operations and data 
+    words, whatever other random calls are made by the test. The generator 
+    is seeded with a seed derived from seed (not correlated with generators
+    seeded with seed itself). If seed is None, the plan is seeded from the 
+    random module.
+    '''
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.random = random.Random("%d.plan" % seed)
+
+    #operation of a combination of SPACE, the number of words (if not given)
+    #and the divider are picked from the ranges
+    def operation(self, direction, repeat_range, divider_range, repeat=None):
+        if repeat is None:
+            repeat = self.random.randint(repeat_range[0], repeat_range[1])
+        divider = self.random.randint(divider_range[0], divider_range[1])
+        return Operation(direction, repeat, divider, repeat_range, 
+          divider_range, self.words(repeat))
+
+    #fully random operation, same distribution as I2C_Operation.randomize()
+    def random_operation(self):
+        return self.operation(*self.random.choice(SPACE))
+
+    #n random data words
+    def words(self, n):
+        words = array('I', 
+          self.random.getrandbits(32*n).to_bytes(4*n, "little"))
+        if sys.byteorder == "big":
+            words.byteswap()
+        return words
+
+#Generator of I2C Operations directed to coverage holes
+class OperationGenerator(object):
+    '''
+    Coverage Hole Directed Operation Generator
+
+    Operations are drawn directly from the not yet covered bins of the 
+    top.op.cross, the set of holes is updated by the bins callbacks of 
+    the cross. Among the holes, the ones closing also a bin of the operations
+    order coverage (top.op.direction_order and top.op.repeat_order) after
+    the previous operation are preferred (order_weight). When there are no 
+    holes left, operations are fully randomized. Operations and their data
+    words are provided by the plan (StimulusPlan).
+    '''
+
+    def __init__(self, order_weight=4, plan=None):
+        self.order_weight = order_weight
+        self.plan = plan if plan is not None else StimulusPlan()
+        self._cross = coverage_db["top.op.cross"]
+        self._direction_order = coverage_db["top.op.direction_order"]
+        self._repeat_order = coverage_db["top.op.repeat_order"]
+        self.holes = set()
+        for x_bin, hits in self._cross.detailed_coverage.items():
+            if hits < self._cross.at_least:
+                self.holes.add(x_bin)
+                self._cross.add_bins_callback(self._covered(x_bin), x_bin)
+                
+    def _covered(self, x_bin):
+        def callback():
+            if self._cross.detailed_coverage[x_bin] >= self._cross.at_least:
+                self.holes.discard(x_bin)
+        return callback
+        
+    def _order_holes(self, cover_point):
+        return [bin for (bin, hits) in cover_point.detailed_coverage.items()
+          if hits < cover_point.at_least]
+        
+    #repeat values in range closing a hole of the repeat order coverage
+    def _repeat_candidates(self, prev_repeat, repeat_range, repeat_holes):
+        return [repeat 
+          for repeat in range(repeat_range[0], repeat_range[1]+1)
+          if any(low <= prev_repeat - repeat <= high 
+            for (low, high) in repeat_holes)
+        ]
+        
+    def next(self, prev_operation=None):
+        if not self.holes:
+            return self.plan.random_operation()
+        
+        candidates = sorted(self.holes)
+        weights = [1]*len(candidates)
+        repeats = [None]*len(candidates)
+        if prev_operation is not None:
+            direction_holes = self._order_holes(self._direction_order)
+            repeat_holes = self._order_holes(self._repeat_order)
+            for i, (direction, repeat_range, divider_range) in \
+              enumerate(candidates):
+                if (prev_operation.direction, direction) in direction_holes:
+                    weights[i] += self.order_weight
+                repeats[i] = self._repeat_candidates(
+                  prev_operation.repeat, repeat_range, repeat_holes
+                )
+                if repeats[i]:
+                    weights[i] += self.order_weight
+        
+        i = self.plan.random.choices(range(len(candidates)), weights)[0]
+        (direction, repeat_range, divider_range) = candidates[i]
+        return self.plan.operation(direction, repeat_range, divider_range,
+          self.plan.random.choice(repeats[i]) if repeats[i] else None)
@@ -0,0 +1,113 @@
+"""
+Testbench of the apbi2c controller - throughput instrumentation
+
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from cocotb.utils import get_sim_time
+
+#Mixin counting the trigger wake-ups of a testbench agent, the agent 
+#awaits the triggers through _wait(), which returns the trigger as it is 
+#unless the counting is enabled (count_wakeups())
+class WakeupCounter(object):
+    wakeups = 0
+
+    def _wait(self, trigger):
+        return trigger
+
+    async def _counted_wait(self, trigger):
+        self.wakeups += 1
+        return await trigger
+
+    def count_wakeups(self):
+        self._wait = self._counted_wait
+
+#Per segment statistics
+class Profiler(object):
+    '''
+    Profiler
+
+    Records for each named segment of the test: number of executions, 
+    simulated time (ns), wall-clock time (s), trigger wake-ups of each agent
+    (objects with the wakeups counter, see WakeupCounter) and coverage bins 
+    gained (coverage of the cover item). Segments may be code blocks 
+    (segment()) or functions calls (wrap()). If not enabled, nothing is 
+    recorded and the agents and functions are not instrumented.
+    '''
+
+    def __init__(self, agents, cover_item=None, enabled=True):
+        self.agents = agents
+        self.cover_item = cover_item
+        self.enabled = enabled
+        if enabled:
+            for agent in agents.values():
+                agent.count_wakeups()
+        self.segments = {}
+        self._start_wall = time.perf_counter()
+        self._start_sim = get_sim_time('ns')
+
+    def _sample(self):
+        return (
+          get_sim_time('ns'), time.perf_counter(), 
+          [agent.wakeups for agent in self.agents.values()],
+          0 if self.cover_item is None else self.cover_item.coverage
+        )
+
+    def _record(self, name, start, end):
+        if name not in self.segments:
+            self.segments[name] = {
+              "count": 0, "sim_ns": 0, "wall_s": 0.0, "coverage_bins": 0,
+              "wakeups": dict.fromkeys(self.agents, 0)
+            }
+        stats = self.segments[name]
+        stats["count"] += 1
+        stats["sim_ns"] += end[0] - start[0]
+        stats["wall_s"] += end[1] - start[1]
+        for agent, start_wakeups, end_wakeups in \
+          zip(self.agents, start[2], end[2]):
+            stats["wakeups"][agent] += end_wakeups - start_wakeups
+        stats["coverage_bins"] += end[3] - start[3]
+
+    #usage: with profiler.segment("name"): ...
+    @contextmanager
+    def segment(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = self._sample()
+        try:
+            yield
+        finally:
+            self._record(name, start, self._sample())
+
+    #function (e.g. a monitor callback) recorded as a segment at each call
+    def wrap(self, name, f):
+        if not self.enabled:
+            return f
+        @wraps(f)
+        def _wrapped_function(*args, **kwargs):
+            with self.segment(name):
+                return f(*args, **kwargs)
+        return _wrapped_function
+
+    def summary(self):
+        sim_ns = get_sim_time('ns') - self._start_sim
+        wall_s = time.perf_counter() - self._start_wall
+        return {
+          "total": {
+            "sim_ns": sim_ns, "wall_s": wall_s,
+            "sim_ns_per_wall_s": sim_ns/wall_s if wall_s else 0.0,
+            "wakeups": dict(
+              (name, agent.wakeups) for name, agent in self.agents.items()
+            )
+          },
+          "segments": self.segments
+        }
+
+    def export_to_json(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.summary(), f, indent=2, sort_keys=True)
@@ -0,0 +1,208 @@
+"""
+Testbench of the apbi2c controller - binary transaction trace
+
+The recorder keeps the transactions observed by the monitors as fixed-width
+records in array-backed ring buffers (one array per field), which are 
+written to the trace file in blocks when full or on flush(). Without a file
+only the last capacity records are kept. The reader (also a command line 
+tool) filters and prints the records of a trace file.
+
+    python recorder.py results_trace.bin --interface apb --addr 8 --start 1000
+
+File format: magic, then blocks of little-endian data, each is the number 
+of records (uint32) followed by the arrays of the fields.
+
+"""
+
+import argparse
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from cocotb.utils import get_sim_time
+
+MAGIC = b"APBI2CT1"
+
+#interfaces
+APB = 0
+I2C = 1
+INTERFACES = {"apb": APB, "i2c": I2C}
+
+#flags
+WRITE = 0x1
+DATA_X = 0x2
+ADDR_X = 0x4
+
+#fields with their array typecodes
+FIELDS = [
+  ("time", "Q"), ("interface", "B"), ("addr", "I"), ("data", "I"), 
+  ("flags", "B"), ("delay", "I")
+]
+
+TraceRecord = namedtuple("TraceRecord", 
+  ["time", "interface", "addr", "data", "write", "delay"])
+
+#Always-on transaction recorder
+class TraceRecorder(object):
+    '''
+    Trace Recorder
+
+    The apb() and i2c() methods are the callbacks of the monitors (APBRecord
+    and I2CRecord). Records are flushed in blocks to the file, if given, or 
+    the ring buffers wrap around (records() returns the kept ones).
+    '''
+
+    def __init__(self, filename=None, capacity=4096):
+        self.capacity = capacity
+        self.count = 0
+        self._index = 0
+        self._wrapped = False
+        self._time = array("Q", bytes(8*capacity))
+        self._interface = array("B", bytes(capacity))
+        self._addr = array("I", bytes(4*capacity))
+        self._data = array("I", bytes(4*capacity))
+        self._flags = array("B", bytes(capacity))
+        self._delay = array("I", bytes(4*capacity))
+        self._arrays = [self._time, self._interface, self._addr, self._data,
+          self._flags, self._delay]
+        self._file = None
+        if filename is not None:
+            self._file = open(filename, "wb")
+            self._file.write(MAGIC)
+
+    def record(self, interface, addr, data, write, delay=0):
+        i = self._index
+        #time in ns is a float if the simulator precision is finer
+        self._time[i] = int(get_sim_time('ns'))
+        self._interface[i] = interface
+        flags = WRITE if write else 0
+        if addr is None:
+            self._addr[i] = 0
+            flags |= ADDR_X
+        else:
+            self._addr[i] = addr
+        if data is None:
+            self._data[i] = 0
+            flags |= DATA_X
+        else:
+            self._data[i] = data
+        self._flags[i] = flags
+        self._delay[i] = delay
+        self.count += 1
+        i += 1
+        if i == self.capacity:
+            if self._file is not None:
+                self._index = i
+                self.flush()
+                return
+            i = 0
+            self._wrapped = True
+        self._index = i
+
+    def apb(self, xaction):
+        self.record(APB, xaction.addr, xaction.data, xaction.write, 
+          xaction.delay)
+
+    def i2c(self, xaction):
+        self.record(I2C, 0, xaction.data, xaction.write)
+
+    #write the buffered records to the file as a single block
+    def flush(self):
+        if (self._file is None) or (self._index == 0):
+            return
+        n = self._index
+        self._file.write(struct.pack("<I", n))
+        for values in self._arrays:
+            block = values[:n]
+            if sys.byteorder == "big":
+                block.byteswap()
+            block.tofile(self._file)
+        self._file.flush()
+        self._index = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    #records kept in the buffers, oldest first
+    def records(self):
+        order = list(range(self._index))
+        if self._wrapped:
+            order = list(range(self._index, self.capacity)) + order
+        for i in order:
+            yield _record(*(values[i] for values in self._arrays))
+
+def _record(time, interface, addr, data, flags, delay):
+    return TraceRecord(time, interface, None if flags & ADDR_X else addr, 
+      None if flags & DATA_X else data, bool(flags & WRITE), delay)
+
+#all records of a trace file
+def read_trace(filename):
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a transaction trace" % filename)
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                return
+            n = struct.unpack("<I", header)[0]
+            block = []
+            for (field, typecode) in FIELDS:
+                values = array(typecode)
+                values.fromfile(f, n)
+                if sys.byteorder == "big":
+                    values.byteswap()
+                block.append(values)
+            for fields in zip(*block):
+                yield _record(*fields)
+
+#the record as the former transaction log message
+def format_record(record):
+    data = "'X'" if record.data is None else "0x%08X" % record.data
+    if record.interface == APB:
+        addr = "'X'" if record.addr is None else "0x%02X" % record.addr
+        return "%12d ns APB %s %s -> %s (delay %d)" % (record.time,
+          "Write" if record.write else "Read ", addr, data, record.delay)
+    return "%12d ns I2C %s %s" % (record.time, 
+      "Write" if record.write else "Read ", data)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+      description="Print the records of a transaction trace")
+    parser.add_argument("filename", help="trace file")
+    parser.add_argument("--interface", choices=list(INTERFACES),
+      help="interface")
+    parser.add_argument("--addr", type=lambda x : int(x, 0),
+      help="APB address")
+    parser.add_argument("--data", type=lambda x : int(x, 0),
+      help="data value")
+    parser.add_argument("--write", action="store_true", help="writes only")
+    parser.add_argument("--read", action="store_true", help="reads only")
+    parser.add_argument("--x", action="store_true", 
+      help="records with 'X' address or data only")
+    parser.add_argument("--start", type=int, default=0, 
+      help="start time (ns)")
+    parser.add_argument("--end", type=int, default=None, 
+      help="end time (ns)")
+    args = parser.parse_args()
+    for record in read_trace(args.filename):
+        if (record.time < args.start) or \
+          ((args.end is not None) and (record.time > args.end)):
+            continue
+        if (args.interface is not None) and \
+          (record.interface != INTERFACES[args.interface]):
+            continue
+        if (args.addr is not None) and \
+          ((record.interface != APB) or (record.addr != args.addr)):
+            continue
+        if (args.data is not None) and (record.data != args.data):
+            continue
+        if (args.write and not record.write) or \
+          (args.read and record.write):
+            continue
+        if args.x and (record.data is not None) and (record.addr is not None):
+            continue
+        print(format_record(record))
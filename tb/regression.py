@@ -0,0 +1,178 @@
+"""
+Testbench of the apbi2c controller - parallel multi-seed regression
+
+Runs the test (tb/Makefile) with different random seeds in parallel 
+simulator processes, each in its own working directory (with its own 
+results_coverage*.xml). A simulation may run several seeds one after another
+(--session, see SEEDS in test_i2c.py). The coverage of finished runs is 
+merged into one report, all runs are stopped when the merged top coverage 
+reaches the target. The coverage of the runs in progress is followed in 
+their coverage snapshots (see snapshots.py), so the regression is stopped 
+as soon as the target is reached by all runs together, the report is then
+merged from the snapshots. The compiled design is shared by all runs (see 
+tb/Makefile), so the other runs are started when the first one got past 
+the compilation.
+
+    python regression.py --jobs 8 --seeds 32 --session 4 --target 95
+
+"""
+
+import argparse
+import glob
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from xml.etree import ElementTree as et
+
+from cocotb_coverage.coverage import coverage_db, merge_coverage
+
+from coverage import reset_coverage
+from snapshots import load_snapshots
+
+TB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+COVERAGE_FILES = "results_coverage*.xml"
+SNAPSHOTS_FILES = "results_coverage_snapshots*.jsonl"
+
+#printed by cocotb when the simulation has started
+STARTED_MESSAGE = "Seeding Python random module"
+
+#start the simulation of the seeds in the background
+def start_run(seeds, run_dir, make_args):
+    os.makedirs(run_dir, exist_ok=True)
+    env = dict(os.environ, RANDOM_SEED=str(seeds[0]))
+    if len(seeds) > 1:
+        env["SEEDS"] = ",".join(str(seed) for seed in seeds)
+    #the log is inherited by the process, closed here once it is started
+    with open(os.path.join(run_dir, "run.log"), "w") as log:
+        return subprocess.Popen(
+          ["make", "-f", os.path.join(TB_DIR, "Makefile")] + make_args,
+          cwd=run_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+          start_new_session=True
+        )
+
+#wait until the simulation is started (the design is compiled) or finished
+def wait_started(process, run_dir):
+    log_file = os.path.join(run_dir, "run.log")
+    while process.poll() is None:
+        with open(log_file, errors="replace") as f:
+            if STARTED_MESSAGE in f.read():
+                return
+        time.sleep(0.5)
+
+#kill the simulation with all its child processes
+def stop_run(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+#merge coverage files, return the merged top coverage in %
+def merge(files, merged_file):
+    if len(files) == 1:
+        shutil.copyfile(files[0], merged_file)
+    else:
+        merge_coverage(lambda msg : None, merged_file, *files)
+    return float(et.parse(merged_file).getroot().attrib["cover_percentage"])
+
+#load the coverage snapshots in the run directories (of finished and 
+#running simulations) to the coverage database, return the top coverage in %
+def merge_snapshots(run_dirs):
+    reset_coverage()
+    for run_dir in run_dirs:
+        for snapshots_file in sorted(
+          glob.glob(os.path.join(run_dir, SNAPSHOTS_FILES))):
+            load_snapshots(snapshots_file)
+    return coverage_db["top"].cover_percentage
+
+#poll - period (s) of checking the runs, interval - period (s) of merging 
+#the coverage snapshots of the runs in progress
+def run_regression(jobs, seeds, target, out_dir, make_args, session=1, 
+                   log=print, poll=1.0, interval=30.0):
+    pending = [seeds[i:i+session] for i in range(0, len(seeds), session)]
+    running = {}
+    finished = []
+    coverage = 0.0
+    merged_file = os.path.join(out_dir, "merged_coverage.xml")
+    run_dirs = []
+    merged = False
+    first = True
+    last_check = time.perf_counter()
+    while (pending or running) and (coverage < target):
+        #keep all workers busy
+        while pending and (len(running) < jobs):
+            group = pending.pop(0)
+            seed = group[0]
+            run_dir = os.path.join(out_dir, "seed_%d" % seed)
+            running[seed] = (start_run(group, run_dir, make_args), run_dir)
+            run_dirs.append(run_dir)
+            log("Seed%s %s started in %s" % ("s" if len(group) > 1 else "",
+              ", ".join(str(seed) for seed in group), run_dir))
+            if first:
+                wait_started(running[seed][0], run_dir)
+                first = False
+        time.sleep(poll)
+        for seed, (process, run_dir) in list(running.items()):
+            if process.poll() is None:
+                continue
+            del running[seed]
+            results = sorted(glob.glob(os.path.join(run_dir, COVERAGE_FILES)))
+            if not results:
+                log("Seed %d finished with no coverage (exit code %d)" % 
+                  (seed, process.returncode))
+                continue
+            finished.extend(results)
+            coverage = merge(finished, merged_file)
+            merged = True
+            log("Seed %d finished, merged coverage = %.2f %%" % 
+              (seed, coverage))
+        #coverage of the runs in progress
+        if running and (coverage < target) and \
+          (time.perf_counter() - last_check >= interval):
+            last_check = time.perf_counter()
+            progress = merge_snapshots(run_dirs)
+            log("Merged coverage of the runs in progress = %.2f %%" % 
+              progress)
+            if progress >= target:
+                coverage_db.export_to_xml(merged_file)
+                coverage = progress
+                merged = True
+    #target reached, stop the remaining simulations
+    for seed, (process, run_dir) in running.items():
+        stop_run(process)
+        log("Seed %d stopped" % seed)
+    return coverage, (merged_file if merged else None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+      description="Parallel multi-seed regression of the apbi2c testbench")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+      help="number of parallel simulations")
+    parser.add_argument("--seeds", type=int, default=16,
+      help="total number of seeds to run")
+    parser.add_argument("--seed", type=int, default=None,
+      help="seed of the seeds generation")
+    parser.add_argument("--session", type=int, default=1,
+      help="number of seeds run in a single simulation")
+    parser.add_argument("--target", type=float, default=100.0,
+      help="merged top coverage (in %%) to stop the regression at")
+    parser.add_argument("--out", default="regression",
+      help="output directory")
+    parser.add_argument("make_args", nargs="*",
+      help="additional make arguments (e.g. SIM=icarus)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    seeds = rng.sample(range(1, 2**31), args.seeds)
+    coverage, merged_file = run_regression(args.jobs, seeds, args.target,
+      os.path.abspath(args.out), args.make_args, args.session)
+    if merged_file is None:
+        print("No coverage collected")
+    else:
+        print("Merged coverage %.2f %% saved in %s" % (coverage, merged_file))
+    sys.exit(0 if coverage >= args.target else 1)
@@ -0,0 +1,132 @@
+"""
+Testbench of the apbi2c controller - record and replay of failing operations
+
+Before each operation the recorder captures the restored checkpoint, the 
+model state and the state of the random generator, the data words of the 
+operation are collected by the test sequences. Only when the operation 
+fails, a replay file (json) and its checkpoint (see save_checkpoint()) are 
+written. The replay restores the checkpoint and the random state, so the 
+operation is executed with exactly the same stimulus:
+
+    make REPLAY=replay/op_<seed>_<n>.json
+
+"""
+
+import json
+import os
+import random
+import shutil
+from array import array
+
+from checkpoints import save_checkpoint, load_checkpoint
+from operations import Operation
+
+#remove the replays of a previous run (with their checkpoints, possibly of 
+#an older design, and waveforms), to be called once at the start of a run
+def clear_replays(directory="replay"):
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+
+#Recorder of the operations stimulus
+class ReplayRecorder(object):
+    '''
+    Replay Recorder
+    '''
+
+    def __init__(self, seed, directory="replay"):
+        self.seed = seed
+        self.directory = directory
+        self.operations = 0
+        self.saved = []
+        self._start = None
+
+    #to be called just before the operation is executed, background_state 
+    #is the state of the random generator of the background traffic (None 
+    #if there is no background traffic during the operation)
+    def begin(self, checkpoint_name=None, model_state=None, 
+      background_state=None):
+        self.operations += 1
+        self._start = (checkpoint_name, model_state, random.getstate(), 
+          background_state)
+
+    #save the operation started at the last begin(), snapshot is the 
+    #restored checkpoint, returns the replay file name
+    def save(self, operation, snapshot=None, sim_time=None):
+        checkpoint_name, model_state, random_state, background_state = \
+          self._start
+        os.makedirs(self.directory, exist_ok=True)
+        name = os.path.join(self.directory, 
+          "op_%d_%d" % (self.seed, self.operations))
+        checkpoint_file = None
+        if snapshot is not None:
+            checkpoint_file = os.path.abspath(name + ".chkp")
+            save_checkpoint(checkpoint_file, snapshot)
+        with open(name + ".json", "w") as f:
+            json.dump({
+              "seed": self.seed, "operation_index": self.operations,
+              "sim_time_ns": sim_time, "checkpoint_name": checkpoint_name,
+              "checkpoint_file": checkpoint_file, "model_state": model_state,
+              "random_state": random_state, 
+              "background_state": background_state,
+              "operation": {
+                "direction": operation.direction, "repeat": operation.repeat,
+                "divider": operation.divider, "words": list(operation.words)
+              }
+            }, f, indent=1)
+        self.saved.append(name + ".json")
+        return name + ".json"
+
+#state of a random generator stored in json
+def _random_state(record):
+    version, state, gauss = record
+    return (version, tuple(state), gauss)
+
+#Recorded operation to be replayed
+class Replay(object):
+    '''
+    Replay
+
+    The operation (Operation record, words are the recorded data words), the 
+    random and model state, the state of the background traffic generator 
+    (None if there was no background traffic) and the checkpoint (None if 
+    there was no checkpoint) of a replay file. Without a checkpoint, only 
+    the first operation of a seed is reproducible (started from reset), 
+    the start state of the other ones is not recorded.
+    '''
+
+    def __init__(self, filename):
+        with open(filename) as f:
+            record = json.load(f)
+        self.filename = filename
+        self.seed = record["seed"]
+        self.index = record["operation_index"]
+        self.sim_time = record["sim_time_ns"]
+        self.checkpoint_name = record["checkpoint_name"]
+        self.checkpoint_file = record["checkpoint_file"]
+        self.reproducible = (self.checkpoint_file is not None) or \
+          (self.index == 1)
+        op = record["operation"]
+        self.words = op["words"]
+        self.operation = Operation(op["direction"], op["repeat"], 
+          op["divider"], words = array('I', self.words))
+        self.random_state = _random_state(record["random_state"])
+        self.background_state = None
+        if record.get("background_state") is not None:
+            self.background_state = _random_state(record["background_state"])
+        self.model_state = None
+        if record["model_state"] is not None:
+            self.model_state = tuple(
+              tuple(item) if isinstance(item, list) else item
+              for item in record["model_state"]
+            )
+
+    #checkpoint for the given signals (keys of checkpoint())
+    def checkpoint(self, signals):
+        if self.checkpoint_file is None:
+            return None
+        return load_checkpoint(self.checkpoint_file, signals)
+
+    #restore the random state, then the operation may be executed
+    def start(self):
+        random.setstate(self.random_state)
+        return self.operation
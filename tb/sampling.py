@@ -0,0 +1,80 @@
+"""
+Testbench of the apbi2c controller - sampling of the bus signals
+
+"""
+
+#single bit values
+_BITS = {"0": 0, "1": 1}
+
+#Sampler of the bus signals of an agent
+class Sampler(object):
+    '''
+    Bus Signals Sampler
+
+    The handles of the signals are bound once, the readers (reader()) read
+    the values of a group of signals at once (in the ReadOnly phase). The 
+    resolved (integer) values are returned as they are, other values are 
+    decoded from their string form without exceptions: 0/1 strings are 
+    returned as integers, values with X (or U, W, -) bits as None and so 
+    the values with Z bits only. The X and Z samples are counted for each 
+    signal.
+    '''
+
+    def __init__(self, bus, names, name="bus"):
+        self.name = name
+        self._handles = dict((signal, getattr(bus, signal)) for signal in names)
+        self.x_events = dict.fromkeys(names, 0)
+        self.z_events = dict.fromkeys(names, 0)
+
+    #function returning the values of the signals (tuple)
+    def reader(self, *names):
+        handles = tuple(self._handles[signal] for signal in names)
+        decode = self.decode
+        if len(handles) == 1:
+            (s0,), (h0,) = names, handles
+            def read():
+                v0 = h0.value
+                return (v0 if type(v0) is int else decode(s0, v0),)
+            return read
+        if len(handles) == 2:
+            (s0, s1), (h0, h1) = names, handles
+            def read():
+                v0, v1 = h0.value, h1.value
+                return (v0 if type(v0) is int else decode(s0, v0),
+                  v1 if type(v1) is int else decode(s1, v1))
+            return read
+        signals = tuple(zip(names, handles))
+        def read():
+            values = []
+            for (signal, handle) in signals:
+                value = handle.value
+                values.append(value if type(value) is int 
+                  else decode(signal, value))
+            return tuple(values)
+        return read
+
+    #decode a value of the signal (e.g. BinaryValue) from its string form
+    def decode(self, signal, value):
+        binstr = str(value)
+        bit = _BITS.get(binstr)
+        if bit is not None:
+            return bit
+        if binstr and not binstr.strip("01"):
+            return int(binstr, 2)
+        if binstr.strip("01zZ") or not binstr:
+            self.x_events[signal] += 1
+        else:
+            self.z_events[signal] += 1
+        return None
+
+    @property
+    def errors(self):
+        return sum(self.x_events.values()) + sum(self.z_events.values())
+
+    def report(self, logger):
+        def events(counts):
+            return ", ".join("%s %d" % (signal, count) 
+              for (signal, count) in counts.items() if count) or "none"
+        logger("%s: X samples: %s, Z samples: %s" % 
+          (self.name, events(self.x_events), events(self.z_events))
+        )
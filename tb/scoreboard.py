@@ -0,0 +1,108 @@
+"""
+Testbench of the apbi2c controller - streaming in-order scoreboard
+
+"""
+
+import logging
+from collections import deque
+
+from cocotb.utils import get_sim_time
+
+#data of the transaction for reporting
+def _fmt(xaction):
+    try:
+        return "0x%08X" % xaction.data
+    except (AttributeError, TypeError):
+        return str(xaction)
+
+#In-order Scoreboard
+class StreamingScoreboard(object):
+    '''
+    Streaming In-Order Scoreboard
+
+    Expected items are queued with expect() (at most depth outstanding items),
+    each received item is compared on arrival with the oldest expected one.
+    Mismatches, drops (expected but never received) and extras (received
+    but not expected) are reported with the simulation time. Items received
+    while nothing is expected since the last flush() are ignored. When depth
+    items are outstanding, the oldest one is reported as dropped on the next
+    expect(), so depth must cover the largest number of items outstanding at
+    a time (e.g. the words of an operation).
+    '''
+
+    def __init__(self, name, depth=64, log=None):
+        self.name = name
+        self.depth = depth
+        self.log = log if log is not None else \
+          logging.getLogger("cocotb.scoreboard.%s" % name)
+        #(expected item, sim time when queued)
+        self._expected = deque()
+        self._active = False
+        self._window_errors = 0
+        self.matches = 0
+        self.mismatches = 0
+        self.drops = 0
+        self.extras = 0
+        self.ignored = 0
+
+    #monitor wiring, similar to cocotb_bus.scoreboard.Scoreboard
+    def add_interface(self, monitor):
+        monitor.add_callback(self.compare)
+
+    @property
+    def errors(self):
+        return self.mismatches + self.drops + self.extras
+
+    @property
+    def outstanding(self):
+        return len(self._expected)
+
+    def expect(self, xaction):
+        self._active = True
+        if len(self._expected) == self.depth:
+            self._drop(*self._expected.popleft())
+        self._expected.append((xaction, get_sim_time('ns')))
+
+    def compare(self, xaction):
+        if not self._active:
+            self.ignored += 1
+        elif not self._expected:
+            self.extras += 1
+            self._window_errors += 1
+            self.log.error("%s: unexpected item %s received at %d ns" %
+              (self.name, _fmt(xaction), get_sim_time('ns'))
+            )
+        else:
+            expected, queued = self._expected.popleft()
+            if expected != xaction:
+                self.mismatches += 1
+                self._window_errors += 1
+                self.log.error(
+                  "%s: received %s at %d ns, expected %s (queued at %d ns)" %
+                  (self.name, _fmt(xaction), get_sim_time('ns'),
+                   _fmt(expected), queued)
+                )
+            else:
+                self.matches += 1
+
+    #report all outstanding items as dropped and close the checking window,
+    #returns True if no error was found in the window
+    def flush(self):
+        while self._expected:
+            self._drop(*self._expected.popleft())
+        ok = self._window_errors == 0
+        self._window_errors = 0
+        self._active = False
+        return ok
+
+    def _drop(self, expected, queued):
+        self.drops += 1
+        self._window_errors += 1
+        self.log.error("%s: item %s queued at %d ns not received until %d ns" %
+          (self.name, _fmt(expected), queued, get_sim_time('ns'))
+        )
+
+    def report(self, logger):
+        logger("%s: %d matches, %d mismatches, %d drops, %d extras" %
+          (self.name, self.matches, self.mismatches, self.drops, self.extras)
+        )
@@ -0,0 +1,121 @@
+"""
+Testbench of the apbi2c controller - coverage snapshots
+
+The hits of the cover points and crosses are appended periodically to a file
+as deltas (bins hit since the previous snapshot), one json line per 
+snapshot, flushed to the disk - a crash loses at most the last period and 
+the file may be watched during the run. A new run may be started from the 
+coverage of the snapshots (load_snapshots()).
+
+The first line lists the number of bins of each cover item, a snapshot line
+contains the simulation time, the top coverage in % and the deltas as lists
+of [bin index, new hits] of the items.
+
+"""
+
+import json
+import os
+import time
+
+from cocotb.utils import get_sim_time
+from cocotb_coverage.coverage import coverage_db
+
+#cover items with bins under the given one, in the definition order
+def _cover_items(name):
+    return [(item_name, item) for (item_name, item) in coverage_db.items()
+      if ((item_name == name) or item_name.startswith(name + ".")) 
+        and hasattr(item, "_hits")]
+
+#Periodic coverage snapshots
+class CoverageSnapshots(object):
+    '''
+    Coverage Snapshots
+
+    Appends the coverage of the items under name to filename, if at least 
+    interval seconds (wall-clock) passed since the previous snapshot 
+    (update()) or unconditionally (snapshot()). The file is created anew and
+    the first snapshot contains all hits of the items, unless append is set
+    (the file the coverage was resumed from, see load_snapshots()), then the
+    first snapshot contains the hits since the creation of the object.
+    '''
+
+    def __init__(self, filename, name="top", interval=30.0, append=False):
+        self.filename = filename
+        self.name = name
+        self.interval = interval
+        self.snapshots = 0
+        self._items = _cover_items(name)
+        append = append and os.path.exists(filename) and \
+          os.path.getsize(filename) > 0
+        self._last = dict(
+          (item_name, list(item._hits.values()) if append 
+            else [0]*len(item._hits)) 
+          for (item_name, item) in self._items
+        )
+        self._last_time = time.perf_counter()
+        if not append:
+            with open(filename, "w"):
+                pass
+            self._append({"items": dict(
+              (item_name, len(item._hits)) for (item_name, item) in self._items
+            )})
+
+    def _append(self, record):
+        with open(self.filename, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def update(self):
+        if time.perf_counter() - self._last_time >= self.interval:
+            self.snapshot()
+
+    def snapshot(self):
+        deltas = {}
+        for item_name, item in self._items:
+            hits = list(item._hits.values())
+            last = self._last[item_name]
+            delta = [[i, new - old] for (i, (new, old)) in 
+              enumerate(zip(hits, last)) if new != old]
+            if delta:
+                deltas[item_name] = delta
+                self._last[item_name] = hits
+        top = coverage_db[self.name]
+        self._append({"time": get_sim_time('ns'), 
+          "coverage": round(top.cover_percentage, 2), "deltas": deltas})
+        self._last_time = time.perf_counter()
+        self.snapshots += 1
+
+#add the hits of all snapshots in the file to the coverage of the items 
+#under name, returns the number of snapshots loaded (the last line is 
+#skipped if incomplete)
+def load_snapshots(filename, name="top"):
+    items = dict(_cover_items(name))
+    hits = dict((item_name, [0]*len(item._hits)) 
+      for (item_name, item) in items.items())
+    snapshots = 0
+    with open(filename) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "items" in record:
+                for item_name, size in record["items"].items():
+                    if (item_name in items) and \
+                      (size != len(items[item_name]._hits)):
+                        raise ValueError("Bins of %s changed since the "
+                          "snapshots in %s" % (item_name, filename))
+                continue
+            for item_name, delta in record["deltas"].items():
+                if item_name in hits:
+                    for i, new_hits in delta:
+                        hits[item_name][i] += new_hits
+            snapshots += 1
+    for item_name, item in items.items():
+        coverage = item.coverage
+        for bin, new_hits in zip(list(item._hits), hits[item_name]):
+            item._hits[bin] += new_hits
+        if item.coverage != coverage:
+            item._parent._update_coverage(item.coverage - coverage)
+    return snapshots
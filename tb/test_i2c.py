@@ -29,11 +29,12 @@ Testbench of the apbi2c controller - top level containing main test logic
 
 """
 
+import os
 import random
 import cocotb
 import cocotb_coverage
 
-from cocotb.triggers import ReadOnly
+from cocotb.triggers import ReadOnly, Event
 from cocotb.clock import Clock, Timer
 from cocotb.result import ReturnValue, TestFailure
 from cocotb_bus.scoreboard import Scoreboard
@@ -45,12 +46,29 @@ from cocotb_checkpoint.checkpoint import *
 
 from apb import *
 #from checkpoint import *
+from checkpoints import *
 from coverage import *
 from i2c import *
+from model import *
+from operations import *
+from scoreboard import *
+from watchdog import *
+from profiling import *
+from recorder import *
+from replay import *
+from snapshots import *
 
-#enable detailed logging of APB and I2C transactions
+#enable detailed logging of APB read errors
 LOG_XACTION_ENABLE = False
 
+#profiling of the test segments to results_profile.json (make PROFILE=1), 
+#adds instrumentation to the agents and monitor callbacks
+PROFILING_ENABLE = os.environ.get("PROFILE", "0") == "1"
+
+#all APB and I2C transactions are recorded in a binary trace file, to be 
+#printed with recorder.py
+TRACE_FILE = "results_trace.bin"
+
 #enable usage of checkpoints during the test 
 ENABLE_CHECKPOINTS = True
 
@@ -59,12 +77,46 @@ ENABLE_CHECKPOINTS = True
 #state, which enables faster coverage closure
 CHECKPOINTS_TREE_STRUCTURE = True
 
+#period of the PCLK clock
+CLOCK_PERIOD = 1000
+
+#memory budget (bytes) of the checkpoints kept in memory, least recently used 
+#("lru") or least contributing to the coverage ("coverage") checkpoints are
+#spilled to the disk (see checkpoints.py)
+CHECKPOINTS_MEMORY_BUDGET = 64*1024*1024
+CHECKPOINTS_EVICTION = "lru"
+
+#store only the signals changed since the restored (parent) checkpoint
+CHECKPOINTS_INCREMENTAL = True
+
+#failing operations are recorded in this directory to be replayed (it is 
+#cleared at the start of a run), the test replays only the recorded 
+#operation if REPLAY is set (see replay.py), the main run dumps no 
+#waveforms - "make failure_waves" replays each recorded operation with 
+#dumping enabled (see Makefile)
+REPLAY_DIR = "replay"
+REPLAY_FILE = os.environ.get("REPLAY")
+
+#coverage deltas are appended to the snapshots file periodically (seconds),
+#a run started with RESUME set to a snapshots file continues from its 
+#coverage (see snapshots.py), each seed of a SEEDS session starts from the 
+#resumed coverage, the snapshots file of the run is overwritten unless it is
+#the resumed one
+COVERAGE_SNAPSHOTS_FILE = "results_coverage_snapshots.jsonl"
+COVERAGE_SNAPSHOTS_INTERVAL = 30.0
+RESUME_FILE = os.environ.get("RESUME")
+
+#seeds to be run one after another in this simulation (comma separated list
+#in SEEDS), if not set, a single run with the cocotb random seed
+SEEDS = [int(seed) for seed in os.environ.get("SEEDS", "").split(",") 
+  if seed.strip()]
+
 @cocotb.test
 async def test_tree(dut):
     """Testing APBI2C core"""
     
     log = cocotb.logging.getLogger("cocotb.test")
-    cocotb.start_soon(Clock(dut.PCLK, 1000).start())
+    cocotb.start_soon(Clock(dut.PCLK, CLOCK_PERIOD).start())
 
     #instantiate the APB agent (monitor and driver) (see apb.py)
     apb = APBSlave(dut, name=None, clock=dut.PCLK)
@@ -72,6 +124,13 @@ async def test_tree(dut):
     #instantiate the I2C monitor and driver (see i2c.py)
     i2c_monitor = I2CMonitor(dut, name="", clock=dut.PCLK)
     i2c_driver = I2CDriver(dut, name=None, clock=dut.PCLK)
+    
+    #sim time, wall time, agents wake-ups and coverage gain of the test 
+    #segments (see profiling.py), if enabled
+    profiler = Profiler(
+      {"apb": apb, "i2c_monitor": i2c_monitor, "i2c_driver": i2c_driver},
+      coverage_db["top"], enabled=PROFILING_ENABLE
+    )
             
     #write to config register via APB
     async def config_write(addr, data):
@@ -79,69 +138,47 @@ async def test_tree(dut):
         xaction.randomize()
         await apb.send(xaction)
             
-    #store observed I2C transactions
-    received_i2c_xactions = []
+    #in-order checking of the I2C transactions observed during write 
+    #operations (see scoreboard.py), the depth covers the words of the 
+    #longest operation (31, see operations.py)
+    i2c_scoreboard = StreamingScoreboard("i2c", depth=32, log=log)
+    
+    #in-order checking of the words read from the RX FIFO during read 
+    #operations against the words sent on I2C
+    rx_scoreboard = StreamingScoreboard("i2c_rx", depth=32, log=log)
+    
+    #transaction-level model of the controller predicting the I2C words 
+    #sent out from the observed APB transfers (see model.py)
+    model = APBI2CModel()
+    model.add_callback(i2c_scoreboard.expect)
+    apb.add_callback(model.observe_apb)
     
     #the catcher for observerd I2C transaction on the interfece
     @I2CCoverage
     def i2c_xaction_catcher(i2c_xaction):
-        if LOG_XACTION_ENABLE:
-            log.info("I2C Monitor: Transaction 0x%08X" % i2c_xaction.data)
-        received_i2c_xactions.append(i2c_xaction)
+        pass
         
     #callback to the monitor to call the catcher when I2C transaction observed
-    i2c_monitor.add_callback(i2c_xaction_catcher)
+    i2c_monitor.add_callback(
+      profiler.wrap("coverage_i2c", i2c_xaction_catcher)
+    )
+    i2c_scoreboard.add_interface(i2c_monitor)
     
     #the catcher for observerd APB transaction on the interfece
     @APBCoverage
     def apb_xaction_catcher(apb_xaction):
-        if LOG_XACTION_ENABLE:
-            try:
-                log.info("APB Transaction %s 0x%08X -> 0x%08X" % 
-                    ("Write" if apb_xaction.write else "Read ", 
-                     int(apb_xaction.addr), int(apb_xaction.data))
-                )
-            except:
-                log.info("APB Transaction %s 0x%08X -> 0x%08s" % 
-                    ("Write" if apb_xaction.write else "Read ", 
-                     int(apb_xaction.addr), int(apb_xaction.data))
-                )
+        pass
                 
     #callback to the monitor to call the catcher when APB transaction observed
-    apb.add_callback(apb_xaction_catcher)
+    apb.add_callback(profiler.wrap("coverage_apb", apb_xaction_catcher))
+    
+    #record of all observed transactions (see recorder.py), a replay is 
+    #recorded next to its replay file
+    trace = TraceRecorder(os.path.splitext(REPLAY_FILE)[0] + "_trace.bin"
+      if REPLAY_FILE else TRACE_FILE)
+    apb.add_callback(trace.apb)
+    i2c_monitor.add_callback(trace.i2c)
     
-    #define "I2C Operation" as a bunch of r/ws with defined number of data 
-    #and a specific clock divider
-    #this is the main stuff to be tested - we want to know if controller 
-    #correctly processes transfers with different directions, amount of 
-    #data and SCK period
-    class I2C_Operation(Randomized):
-        def __init__(self, direction = 'write', repeat = 1, divider = 1):
-            Randomized.__init__(self)
-            self.direction = direction
-            self.repeat = repeat
-            self.divider = divider
-            self.repeat_range = (1,3)
-            self.divider_range = (1,3)
-            
-            #I2C_Operation objects may be fully randomized
-            self.add_rand("direction",["write", "read"])
-            self.add_rand("repeat_range",
-              [(1,3), (4,7), (8,11), (12,15), (16,23), (24,31)]
-            )
-            self.add_rand("divider_range",
-              [(1,3), (4,7), (8,11), (12,15), (16,23), (24,31)]
-            )
-        
-        #post_randomize to pick random values from already randomized ranges
-        def post_randomize(self):
-            self.repeat = random.randint(
-              self.repeat_range[0], self.repeat_range[1]
-            )
-            self.divider = random.randint(
-              self.divider_range[0], self.divider_range[1]
-            )
-            
     #list of completed operations for the summary
     operations_completed = []
 
@@ -172,87 +209,112 @@ async def test_tree(dut):
               
     #a test sequence - complete I2C Write Operation
     async def segment_i2c_write_operation(operation):
-        expected_out = []
         await config_write(8, 0x0001 | (operation.divider << 2))
         
-        #create xaction objects and fill FIFO up via APB with data to be send
-        apb_xaction = APBTransaction(0, 0, write=True)
-        for i in range(operation.repeat):
-            i2c_xaction = I2CTransaction(0, write=False)
-            i2c_xaction.randomize()
-            apb_xaction.data = i2c_xaction.data
-            apb_xaction.randomize()
-            await apb.send(apb_xaction)
-            expected_out.append(i2c_xaction)
+        #fill FIFO up via APB with the data words of the operation (a single
+        #back-to-back APB burst), the expected I2C words are predicted by 
+        #the model
+        await apb.send_many(
+          [APBTransaction(0, data, write=True) for data in operation.words]
+        )
         
-        #wait for FIFO empty - meaning all data sent out
-        guard_int = 0
-        while not dut.INT_TX.value:
-            guard_int = guard_int + 1
-            await RisingEdge(dut.PCLK)
-            if guard_int == 50000:
-                #raise TestFailure("Controller hang-up!")
-                    ok = False
-                    break
+        #wait for FIFO empty - meaning all data sent out, give up when
+        #no activity on SCL or the transfer takes too long
+        hang = await wait_for_completion(dut.INT_TX, CLOCK_PERIOD,
+          i2c_timeout_cycles(operation.repeat, operation.divider),
+          lambda : i2c_monitor.scl_edges, 
+          i2c_stall_cycles(operation.divider)
+        )
+        if hang is not None:
+            log.error("Controller hang-up (%s) at %d ns!" % 
+              (hang, get_sim_time('ns')))
             
-        #a simple scoreboarding...
-        #compare data written to APB with catched on I2C interface
-        ok = True
-        received_xactions = received_i2c_xactions[-operation.repeat:]
-        if len(received_xactions) < operation.repeat:
-            ok = False
-        else:
-            for i in range(operation.repeat):
-                if (received_xactions[i] != expected_out[i]):
-                    ok = False
-                    break
+        #data written to APB were compared on the fly with catched on I2C 
+        #interface, anything not received yet is an error
+        ok = i2c_scoreboard.flush() and (hang is None)
         
         #call sampling at the and of the sequence
         sample_operation(operation, ok)
         
     #a test sequence - complete I2C Read Operation
+    #the words are sent on the I2C interface (producer) while the RX FIFO is
+    #drained via APB (consumer) - the consumer starts after a random number 
+    #of words (FIFO filled up) and sometimes reads the empty FIFO (underflow,
+    #data not checked), read data are compared in order on the fly
     async def segment_i2c_read_operation(operation):
-        expected_in = []
         await config_write(8, 0x0002 | (operation.divider << 2))
         
-        #create I2C xaction objects and send on the interface
-        for i in range(operation.repeat):
-            i2c_xaction = I2CTransaction(0, write=True)
-            i2c_xaction.randomize()
-            expected_in.append(i2c_xaction)
-            await i2c_driver.send(i2c_xaction)
+        #number of words sent and not read yet
+        pending = 0
+        word_sent = Event()
+        lag = random.randint(0, operation.repeat)
         
-        #a simple scoreboarding...
-        #compare data written on I2C interface with read from FIFO
-        ok = True
-        apb_xaction = APBTransaction(0x04, 0, write=False)
-        for i in range(operation.repeat):
-            try:
+        #send the data words of the operation on the interface
+        async def producer():
+            nonlocal pending
+            for data in operation.words:
+                i2c_xaction = I2CTransaction(data, write=True)
+                await i2c_driver.send(i2c_xaction)
+                rx_scoreboard.expect(i2c_xaction)
+                pending += 1
+                word_sent.set()
+                
+        async def wait_word():
+            word_sent.clear()
+            await word_sent.wait()
+            
+        #read the received words from the FIFO
+        async def consumer():
+            nonlocal pending
+            apb_xaction = APBTransaction(0x04, 0, write=False)
+            while pending < lag:
+                await wait_word()
+            for i in range(operation.repeat):
+                while pending == 0:
+                    if random.random() < RX_UNDERFLOW_RATE:
+                        apb_xaction.randomize()
+                        await apb.send(apb_xaction)
+                    else:
+                        await wait_word()
+                pending -= 1
                 apb_xaction.randomize()
-                rdata = await apb.send(xaction)
-                if (rdata != expected_in[i].data):
-                    ok = False
-            except:
-                if LOG_XACTION_ENABLE:
-                    log.error("APB read data from FIFO is 'X'")
-                ok = False
+                rdata = await apb.send(apb_xaction)
+                try:
+                    rdata = int(rdata)
+                except ValueError:
+                    if LOG_XACTION_ENABLE:
+                        log.error("APB read data from FIFO is 'X'")
+                    rdata = None
+                rx_scoreboard.compare(I2CRecord(rdata, False))
+                
+        producer_task = cocotb.start_soon(producer())
+        await consumer()
+        await producer_task
+        ok = rx_scoreboard.flush()
                 
         #call sampling at the and of the sequence
         sample_operation(operation, ok)
         
-    #a test sequence - APB registers operation (sort of UVM_REG :) )
-    async def segment_apb_rw(repeat = 1, addr = 0xC):
+    #a test sequence - APB registers operation (sort of UVM_REG :) ), runs 
+    #in the background of an I2C operation until apb_rw_enabled is cleared,
+    #transfers are arbitrated with the foreground ones by the APB agent, 
+    #the background random generator does not change the operations stimulus
+    #(its state is recorded for the replay of the operation)
+    apb_rw_enabled = False
+    apb_rw_random = random.Random("%d.apb_rw" % cocotb.RANDOM_SEED)
+    
+    async def segment_apb_rw(addr = 0xC):
         
         apb_xaction_wr = APBTransaction(addr, 0, write=True)
         apb_xaction_rd = APBTransaction(addr, 0, write=False)
         
-        #just do some APB/RW
-        for i in range(repeat):
-            data = random.randint(0,0xFFFFFFFF)
-            apb_xaction_wr.randomize()
+        #just do some APB/RW, the rounds are drawn as on the model (see 
+        #model.py)
+        while apb_rw_enabled:
+            data, apb_xaction_wr.delay, apb_xaction_rd.delay, gap = \
+              apb_rw_round(apb_rw_random)
             apb_xaction_wr.data = data
             await apb.send(apb_xaction_wr)
-            apb_xaction_rd.randomize()
             rdata = await apb.send(apb_xaction_rd)
             if LOG_XACTION_ENABLE:
                 try:
@@ -263,104 +325,244 @@ async def test_tree(dut):
                         )
                 except:
                     log.error("APB read data @ 0x%08X is 'X'" % addr)
+            await Timer(gap*CLOCK_PERIOD)
                 
     #reset the DUT
-    dut.PRESETn.value = 0
-    await Timer(2000)
-    dut.PRESETn.value = 1
+    async def reset():
+        model.reset()
+        dut.PRESETn.value = 0
+        await Timer(2000)
+        dut.PRESETn.value = 1
+        
+        await config_write(12, 0x0100)
+        
+    await reset()
     
-    await config_write(12, 0x0100)
+    #replay a recorded operation from its checkpoint and finish
+    if REPLAY_FILE:
+        replay = Replay(REPLAY_FILE)
+        log.info("Replaying operation %d of seed %d (failed at %s ns) from "
+          "checkpoint %s" % (replay.index, replay.seed, replay.sim_time, 
+           replay.checkpoint_name))
+        if not replay.reproducible:
+            raise ValueError("Operation %d of seed %d was not started from a "
+              "checkpoint (checkpoints disabled), its start state cannot be "
+              "restored" % (replay.index, replay.seed))
+        if replay.checkpoint_file is not None:
+            get_checkpoint_hier(dut)
+            restore(replay.checkpoint(checkpoint().keys()))
+        if replay.model_state is not None:
+            model.restore(replay.model_state)
+        i2c_op = replay.start()
+        #the same background traffic as during the recorded operation
+        if replay.background_state is not None:
+            apb_rw_random.setstate(replay.background_state)
+            apb_rw_enabled = True
+            apb_rw_task = cocotb.start_soon(segment_apb_rw())
+        if i2c_op.direction == "read":
+            await segment_i2c_read_operation(i2c_op)
+        else:
+            await segment_i2c_write_operation(i2c_op)
+        if replay.background_state is not None:
+            apb_rw_enabled = False
+            await apb_rw_task
+        log.info("Recorded failure %s" % 
+          ("not reproduced" if operations_completed[-1][1] else "reproduced"))
+        trace.close()
+        return
 
-    #if checkpoints used, store them in the map, (see checkpoint.py)
+    #post-reset state, the starting point of each seed
     if ENABLE_CHECKPOINTS:
-        checkpoints = {}
         get_checkpoint_hier(dut)
-        #the fist checkpoint is just after reset
-        checkpoints['0'] = (checkpoint(), None)
-    
-    #list of already covered operations, used to constraint the randomization
-    already_covered = []
+        reset_checkpoint = checkpoint()
+        reset_model_state = model.snapshot()
+        
+    #the coverage loop of a single seed
+    async def run_seed(seed, coverage_file, snapshots_file):
+        nonlocal apb_rw_enabled
+        
+        #coverage of the previous run(s)
+        if RESUME_FILE:
+            log.info("Resuming the coverage from %d snapshots in %s" % 
+              (load_snapshots(RESUME_FILE), RESUME_FILE))
+        coverage_snapshots = CoverageSnapshots(snapshots_file, 
+          interval=COVERAGE_SNAPSHOTS_INTERVAL, append=RESUME_FILE is not None
+            and os.path.abspath(snapshots_file) == RESUME_FILE)
+        
+        #failing operations to be replayed
+        replay_recorder = ReplayRecorder(seed, REPLAY_DIR)
+
+        #if checkpoints used, store them in the map, (see checkpoints.py)
+        if ENABLE_CHECKPOINTS:
+            checkpoints = CheckpointStore(
+              CHECKPOINTS_MEMORY_BUDGET, CHECKPOINTS_EVICTION,
+              incremental=CHECKPOINTS_INCREMENTAL
+            )
+            #the fist checkpoint is just after reset
+            checkpoints['0'] = (reset_checkpoint, None)
+            #model state at each checkpoint
+            model_states = {'0': reset_model_state}
+            #selection of checkpoints to restore based on the coverage gain 
+            #achieved by the operations started from them
+            chkp_scheduler = CheckpointScheduler()
+            chkp_scheduler.add('0')
     
-    #constraint for the operation randomization - do not use already 
-    #covered combinations
-    def op_constraint(direction, divider_range, repeat_range):
-        return not (direction, repeat_range, divider_range) in already_covered
+        #operations and their data words of this seed, generator of 
+        #operations from not yet covered combinations (see operations.py)
+        stimulus_plan = StimulusPlan(seed)
+        op_generator = OperationGenerator(plan=stimulus_plan)
     
-    apb_cover_item = coverage_db["top.apb.writeXdelay"]
-    top_cover_item = coverage_db["top"]
+        apb_cover_item = coverage_db["top.apb.writeXdelay"]
+        top_cover_item = coverage_db["top"]
     
-    #we define test end condition as reaching 90% coverage at the 
-    #top cover item
-    cov_op = 0
-    while cov_op < 90:
+        #we define test end condition as reaching 90% coverage at the 
+        #top cover item
+        cov_op = 0
+        while cov_op < 90:
         
-        #restore randomly selected checkpoint
-        if ENABLE_CHECKPOINTS:
-            if CHECKPOINTS_TREE_STRUCTURE:
-                chkp_to_restore = random.choice(list(checkpoints.keys()))
-            else:
-                chkp_to_restore = '0'
+            #restore selected checkpoint
+            if ENABLE_CHECKPOINTS:
+                if CHECKPOINTS_TREE_STRUCTURE:
+                    chkp_to_restore = chkp_scheduler.select()
+                else:
+                    chkp_to_restore = '0'
 
-            log.info("Restoring a simulation checkpoint at %s ns" % 
-                chkp_to_restore)
-            current_chceckpoint = checkpoints[chkp_to_restore]
-            restore(current_chceckpoint[0])
+                log.info("Restoring a simulation checkpoint at %s ns" % 
+                    chkp_to_restore)
+                with profiler.segment("checkpoint_restore"):
+                    current_chceckpoint = checkpoints[chkp_to_restore]
+                    restore(current_chceckpoint[0])
+                    model.restore(model_states[chkp_to_restore])
     
-        #create I2C operation object to be executed
-        i2c_op = I2C_Operation()
-        #if there is no tree structure, knowledge about already covered 
-        #cases cannot be used
-        if ENABLE_CHECKPOINTS & CHECKPOINTS_TREE_STRUCTURE:
-            try:
-                i2c_op.randomize_with(op_constraint)
-            except:
-                i2c_op.randomize()
-        else:
-            i2c_op.randomize()
-        already_covered.append(
-          (i2c_op.direction, i2c_op.repeat_range, i2c_op.divider_range)
-        )
+            cov_bins_prev = top_cover_item.coverage
         
-        #call test sequence
-        if i2c_op.direction == "read":
-            await segment_i2c_read_operation(i2c_op)
-        else:
-            await segment_i2c_write_operation(i2c_op)
+            #create I2C operation object to be executed
+            #if there is no tree structure, knowledge about already covered 
+            #cases cannot be used
+            if ENABLE_CHECKPOINTS & CHECKPOINTS_TREE_STRUCTURE:
+                i2c_op = op_generator.next(operations_completed[-1][0] 
+                  if operations_completed else None)
+            else:
+                i2c_op = stimulus_plan.random_operation()
+        
+            #call APB test sequence in the background as long as cover item 
+            #apb.writeXdelay coverage level is below 100%
+            apb_rw_enabled = \
+              apb_cover_item.coverage*100/apb_cover_item.size < 100
+            replay_recorder.begin(
+              chkp_to_restore if ENABLE_CHECKPOINTS else None, 
+              model.snapshot(), 
+              apb_rw_random.getstate() if apb_rw_enabled else None
+            )
+            if apb_rw_enabled:
+                apb_rw_task = cocotb.start_soon(segment_apb_rw())
+        
+            #call test sequence
+            if i2c_op.direction == "read":
+                with profiler.segment("segment_i2c_read_operation"):
+                    await segment_i2c_read_operation(i2c_op)
+            else:
+                with profiler.segment("segment_i2c_write_operation"):
+                    await segment_i2c_write_operation(i2c_op)
+                
+            #the APB bus must be idle before a checkpoint is captured or 
+            #restored
+            if apb_rw_enabled:
+                apb_rw_enabled = False
+                with profiler.segment("segment_apb_rw"):
+                    await apb_rw_task
+            cov_bins_gain = top_cover_item.coverage - cov_bins_prev
+        
+            if not operations_completed[-1][1]:
+                replay_file = replay_recorder.save(i2c_op, 
+                  current_chceckpoint[0] if ENABLE_CHECKPOINTS else None, 
+                  get_sim_time('ns'))
+                log.info("Failing operation recorded in %s" % replay_file)
             
-        if ENABLE_CHECKPOINTS:
-            #if status is OK, add this simulation point to the checkpoints list
-            if operations_completed[-1][1]: 
-                chkp_name = str(get_sim_time('ns'))
-                log.info("Creating a simulation checkpoint: " + chkp_name)
-                checkpoints[chkp_name] = (checkpoint(), i2c_op)
+            if ENABLE_CHECKPOINTS:
+                chkp_scheduler.update(chkp_to_restore, cov_bins_gain)
+                checkpoints.credit(chkp_to_restore, cov_bins_gain)
+                #if status is OK, add this simulation point to the 
+                #checkpoints list
+                if operations_completed[-1][1]: 
+                    chkp_name = str(get_sim_time('ns'))
+                    log.info("Creating a simulation checkpoint: " + chkp_name)
+                    #coverage contribution of the checkpoint is the number of
+                    #bins covered by the operation leading to it
+                    with profiler.segment("checkpoint_capture"):
+                        checkpoints.add(chkp_name, checkpoint(), i2c_op, 
+                          cov_bins_gain, parent=chkp_to_restore)
+                    model_states[chkp_name] = model.snapshot()
+                    chkp_scheduler.add(chkp_name, i2c_op, 
+                      parent=chkp_to_restore)
                 
-        #call APB test sequence as long as cover item apb.writeXdelay 
-        #coverage level is below 100%
-        if apb_cover_item.coverage*100/apb_cover_item.size < 100:
-            await segment_apb_rw(repeat = random.randint(1,5))
-                    
-        #update the coverage level
+            #update the coverage level
         
-        cov_op_prev = cov_op
-        cov_op = top_cover_item.coverage*100.0/top_cover_item.size
-        log.info("Current overall coverage level = %f %%", cov_op)
+            cov_op = top_cover_item.coverage*100.0/top_cover_item.size
+            log.info("Current overall coverage level = %f %%", cov_op)
+            coverage_snapshots.update()
         
-    #print summary
-    log.info("Opertions finished succesfully:")
-    for elem in operations_completed:
-        if elem[1]:
-            log.info("   %s of %d words with divider %d" % 
-              (elem[0].direction, elem[0].repeat, elem[0].divider)
-            )
+        #print summary
+        log.info("Opertions finished succesfully:")
+        for elem in operations_completed:
+            if elem[1]:
+                log.info("   %s of %d words with divider %d" % 
+                  (elem[0].direction, elem[0].repeat, elem[0].divider)
+                )
             
-    log.info("Opertions finished with error:")
-    for elem in operations_completed:
-        if not elem[1]:
-            log.info("   %s of %d words with divider %d" % 
-              (elem[0].direction, elem[0].repeat, elem[0].divider)
-            )
+        log.info("Opertions finished with error:")
+        for elem in operations_completed:
+            if not elem[1]:
+                log.info("   %s of %d words with divider %d" % 
+                  (elem[0].direction, elem[0].repeat, elem[0].divider)
+                )
             
-    log.info("Functional coverage details:")
-    coverage_db.report_coverage(log.info, bins=False)
-    coverage_db.export_to_xml("results_coverage.xml")
+        if ENABLE_CHECKPOINTS:
+            log.info("Checkpoints statistics:")
+            chkp_scheduler.report(log.info)
+        log.info("Functional coverage details (seed %d):" % seed)
+        coverage_db.report_coverage(log.info, bins=False)
+        coverage_db.export_to_xml(coverage_file)
+        coverage_snapshots.snapshot()
+        return top_cover_item.cover_percentage
+        
+    #independent seeds in this simulation (SEEDS), each starts from the 
+    #post-reset state with the coverage cleared and the random generators 
+    #seeded with the seed (as a standalone run of the seed) and reports its 
+    #own coverage, the background traffic and the stimulus plan generators 
+    #are seeded with seeds derived from the seed, so the streams of the 
+    #three generators are not correlated
+    seeds_coverage = []
+    clear_replays(REPLAY_DIR)
+    for (i, seed) in enumerate(SEEDS or [cocotb.RANDOM_SEED]):
+        if i > 0:
+            reset_coverage()
+            operations_completed.clear()
+            if ENABLE_CHECKPOINTS:
+                restore(reset_checkpoint)
+                model.restore(reset_model_state)
+            else:
+                await reset()
+        random.seed(seed)
+        apb_rw_random.seed("%d.apb_rw" % seed)
+        if SEEDS:
+            log.info("Starting seed %d" % seed)
+            coverage_file = "results_coverage_%d.xml" % seed
+            snapshots_file = "results_coverage_snapshots_%d.jsonl" % seed
+        else:
+            coverage_file = "results_coverage.xml"
+            snapshots_file = COVERAGE_SNAPSHOTS_FILE
+        seeds_coverage.append(
+          (seed, await run_seed(seed, coverage_file, snapshots_file))
+        )
+        
+    for seed, cover_percentage in seeds_coverage:
+        log.info("Seed %d: coverage = %.2f %%" % (seed, cover_percentage))
+    i2c_scoreboard.report(log.info)
+    rx_scoreboard.report(log.info)
+    apb.sampler.report(log.info)
+    i2c_monitor.sampler.report(log.info)
+    trace.close()
+    if PROFILING_ENABLE:
+        profiler.export_to_json("results_profile.json")
     
@@ -0,0 +1,39 @@
+"""
+Testbench of the apbi2c controller - unit tests of the testbench components,
+no simulator needed
+
+    python -m pytest tests
+
+"""
+
+import os
+import sys
+
+#testbench modules are imported from the tb directory
+TB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TB_DIR)
+
+import pytest
+
+import profiling
+import recorder
+import scoreboard
+import snapshots
+
+#modules reading the simulation time, outside of a simulation
+SIM_TIME_MODULES = [profiling, recorder, scoreboard, snapshots]
+
+#simulation time in ns returned by get_sim_time of the modules
+class SimTime(object):
+    def __init__(self):
+        self.ns = 0
+
+    def __call__(self, units=None):
+        return self.ns
+
+@pytest.fixture(autouse=True)
+def sim_time(monkeypatch):
+    clock = SimTime()
+    for module in SIM_TIME_MODULES:
+        monkeypatch.setattr(module, "get_sim_time", clock)
+    return clock
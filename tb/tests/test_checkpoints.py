@@ -0,0 +1,76 @@
+"""
+Testbench of the apbi2c controller - unit tests of the checkpoints storage
+and scheduling
+
+"""
+
+import gc
+import random
+import tracemalloc
+
+from cocotb.binary import BinaryValue
+
+from checkpoints import CheckpointScheduler, CheckpointStore
+
+#the checkpoints are added as in test_tree: after the run restored from 
+#the parent was recorded
+def run(scheduler, name, new_bins, new_checkpoint):
+    scheduler.update(name, new_bins)
+    scheduler.add(new_checkpoint, parent=name)
+
+def test_revisit_high_gain():
+    scheduler = CheckpointScheduler()
+    scheduler.add("0")
+    assert scheduler.select() == "0"
+    run(scheduler, "0", 10, "a")
+    #the new checkpoint inherits the high gain of its parent
+    assert scheduler.select() == "a"
+    run(scheduler, "a", 1, "b")
+    #the newest checkpoint is not forced, the older one with high gain 
+    #is restored again
+    assert scheduler.select() == "0"
+
+def test_explore_new():
+    scheduler = CheckpointScheduler()
+    scheduler.add("0")
+    for i in range(5):
+        run(scheduler, "0", 0, str(i + 1))
+    #no gain so far, the never restored checkpoints are explored
+    assert scheduler.select() != "0"
+
+def test_incremental_store(tmp_path):
+    store = CheckpointStore(spill_dir=str(tmp_path), incremental=True)
+    full = {"a": BinaryValue("0101", 4), "b": 1, "c": BinaryValue("x", 1)}
+    store.add("0", full)
+    changed = dict(full, a=BinaryValue("0111", 4))
+    store.add("1", changed, parent="0")
+    #only the changed signal is stored
+    assert store._memory["1"] == b"0:b0111"
+    store.add("2", dict(changed, c=BinaryValue("1", 1)), parent="1")
+    snapshot = store.get("2")[0]
+    assert [snapshot[s].binstr for s in ("a", "c")] == ["0111", "1"]
+    snapshot = store.get("0")[0]
+    assert [snapshot[s].binstr for s in ("a", "c")] == ["0101", "x"]
+    assert snapshot["b"] == 1
+
+#memory really held by the store (the checkpoints are owned by the store 
+#once added), except the last checkpoint kept decoded
+def test_budget(tmp_path):
+    random.seed(1)
+    signals = ["sig%d" % i for i in range(2000)]
+    values = ["".join(random.choice("01") for bit in range(8)) 
+      for i in range(256)]
+    budget = 256*1024
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    store = CheckpointStore(budget, spill_dir=str(tmp_path))
+    for n in range(40):
+        store.add(str(n), dict((signal, BinaryValue(random.choice(values), 8)) 
+          for signal in signals))
+    store._last = (None, None)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    assert store.spills > 0
+    assert used < 1.25*budget
@@ -0,0 +1,49 @@
+"""
+Testbench of the apbi2c controller - unit tests of the indexed cover point
+
+"""
+
+from importlib.metadata import version
+
+from cocotb_coverage.coverage import CoverPoint, coverage_db
+
+from coverage import reset_coverage
+from coverpoint import COCOTB_COVERAGE_VERSION, IndexedCoverPoint
+from snapshots import CoverageSnapshots, load_snapshots
+
+BINS = [(0, 0), (1, 3), (4, 7)]
+REL = lambda value, bin: bin[0] <= value <= bin[1]
+
+@IndexedCoverPoint("cmp.indexed", xf=lambda value: value, rel=REL, 
+  bins=BINS, at_least=2)
+@CoverPoint("plain.value", xf=lambda value: value, rel=REL, bins=BINS, 
+  at_least=2)
+def _sample(value):
+    pass
+
+def _check():
+    indexed = coverage_db["cmp.indexed"]
+    plain = coverage_db["plain.value"]
+    assert dict(indexed.detailed_coverage) == dict(plain.detailed_coverage)
+    assert indexed.coverage == plain.coverage
+    assert coverage_db["cmp"].coverage == coverage_db["plain"].coverage
+
+def test_version():
+    #the sampling is copied from CoverPoint, check it again on an update
+    assert version("cocotb-coverage") == COCOTB_COVERAGE_VERSION
+
+def test_same_as_cover_point(tmp_path):
+    for value in [0, 2, 3, 0, 5, 9]:
+        _sample(value)
+        _check()
+    filename = str(tmp_path / "snapshots.jsonl")
+    CoverageSnapshots(filename, "cmp").snapshot()
+    CoverageSnapshots(str(tmp_path / "plain.jsonl"), "plain").snapshot()
+    for name in ["cmp", "plain"]:
+        reset_coverage(name)
+    _check()
+    assert coverage_db["cmp"].coverage == 0
+    load_snapshots(filename, "cmp")
+    load_snapshots(str(tmp_path / "plain.jsonl"), "plain")
+    _check()
+    assert coverage_db["cmp.indexed"].coverage == 2
@@ -0,0 +1,55 @@
+"""
+Testbench of the apbi2c controller - unit tests of the I2C monitor
+
+"""
+
+import pytest
+
+import i2c
+import mocksim
+import profiling
+from i2c import I2CMonitor, i2c_waveform
+from mocksim import MockEntity, MockSim
+
+#words sent back to back, without the STOP condition (SCL and SDA stay high
+#from the last ACK of a word until the START of the next one)
+def _waveform(words, divider):
+    wave = []
+    cycle = 0
+    for data in words:
+        word = i2c_waveform(data, divider)[:-3]
+        word[-1] = word[-1][:2] + (1,)
+        wave.extend((cycle + offset, scl, sda) for (offset, scl, sda) in word)
+        cycle += word[-1][0] + 1
+    return wave
+
+def _receive(words, divider, edge_driven):
+    sim = MockSim(1000)
+    records = []
+    async def drive(entity):
+        cycle = 0
+        #idle bus while the monitor starts
+        for i in range(4):
+            await mocksim.RisingEdge(sim.clock)
+        for (offset, scl, sda) in _waveform(words, divider):
+            while cycle < offset:
+                await mocksim.RisingEdge(sim.clock)
+                cycle += 1
+            if scl is not None:
+                entity.SCL.value = scl
+            if sda is not None:
+                entity.SDA.value = sda
+        for i in range(4*divider):
+            await mocksim.RisingEdge(sim.clock)
+    with sim.patched(i2c, profiling):
+        entity = MockEntity(sim, {"SDA": 1, "SCL": 1})
+        monitor = I2CMonitor(entity, "", sim.clock, edge_driven=edge_driven)
+        monitor.add_callback(lambda record: records.append(record.data))
+        sim.run(drive(entity))
+    return records
+
+@pytest.mark.parametrize("divider", [1, 2, 4])
+def test_edges_as_cycles(divider):
+    words = [0x12345678, 0xFFFFFFFF, 0x0, 0x80000001, 0xA5A5A5A5, 0x5A5A5A5A]
+    assert _receive(words, divider, False) == words
+    assert _receive(words, divider, True) == words
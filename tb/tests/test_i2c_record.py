@@ -0,0 +1,13 @@
+"""
+Testbench of the apbi2c controller - unit tests of the I2C records
+
+"""
+
+from i2c import I2CRecord, I2CTransaction
+
+def test_record_compare():
+    assert I2CRecord(5, True) == I2CRecord(5, False)
+    assert I2CRecord(5, True) != I2CRecord(6, True)
+    assert I2CRecord(5, True) == I2CTransaction(5, False)
+    #records equal on data are the same key
+    assert len({I2CRecord(5, True), I2CRecord(5, False)}) == 1
@@ -0,0 +1,52 @@
+"""
+Testbench of the apbi2c controller - unit tests of the model sequences
+
+"""
+
+import random
+
+from model import *
+from operations import StimulusPlan
+
+#operations executed on the model with background traffic, the APB 
+#transfers are fed to a predictor as from the APB monitor in test_tree
+def _run(seed, operations=20):
+    random.seed(seed)
+    plan = StimulusPlan(seed)
+    model = APBI2CModel()
+    sequences = ModelSequences(model)
+    predictor = APBI2CModel()
+    records, sent, predicted = [], [], []
+    sequences.apb_callbacks.append(records.append)
+    sequences.apb_callbacks.append(predictor.observe_apb)
+    model.add_callback(sent.append)
+    predictor.add_callback(predicted.append)
+    results = []
+    for i in range(operations):
+        operation = plan.random_operation()
+        sequences.start_apb_rw(random.Random("%d.apb_rw" % seed))
+        if operation.direction == "read":
+            results.append(sequences.read_operation(operation))
+        else:
+            results.append(sequences.write_operation(operation))
+        sequences.stop_apb_rw()
+    return results, records, sent, predicted
+
+def test_predictor_agrees():
+    results, records, sent, predicted = _run(1)
+    assert all(results)
+    assert sent
+    assert [record.data for record in predicted] == \
+      [record.data for record in sent]
+
+def test_sequences_stimulus():
+    results, records, sent, predicted = _run(2)
+    #background transfers between the TX FIFO writes and RX FIFO reads
+    addrs = [record.addr for record in records]
+    assert REG_TIMEOUT in addrs[addrs.index(REG_RX):]
+    background = [record for record in records if record.addr == REG_TIMEOUT]
+    assert all(write.write and (not read.write) and (read.data == write.data)
+      for (write, read) in zip(background[0::2], background[1::2]))
+    #underflow reads of the empty RX FIFO
+    assert any(record.data is None for record in records 
+      if record.addr == REG_RX)
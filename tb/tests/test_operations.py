@@ -0,0 +1,52 @@
+"""
+Testbench of the apbi2c controller - unit tests of the operations
+
+"""
+
+import random
+
+from cocotb_coverage.crv import Randomized
+
+from operations import I2C_Operation, RANGES, StimulusPlan
+
+def test_randomize_with():
+    #constraints may be given before the first randomization
+    operation = I2C_Operation()
+    operation.randomize_with(lambda direction : direction == "read")
+    assert operation.direction == "read"
+    assert operation.repeat_range in RANGES
+    assert operation.repeat_range[0] <= operation.repeat <= \
+      operation.repeat_range[1]
+    operation = I2C_Operation()
+    operation.add_constraint(lambda divider_range : divider_range == (1,3))
+    operation.randomize()
+    assert 1 <= operation.divider <= 3
+
+def test_plan_not_correlated():
+    #the plan generator does not repeat the stream of the seed itself
+    plan = StimulusPlan(7)
+    assert plan.random.getrandbits(64) != random.Random(7).getrandbits(64)
+
+def _plan(seed, n=50):
+    plan = StimulusPlan(seed)
+    return [(op.direction, op.repeat, op.divider, op.repeat_range,
+      op.divider_range, list(op.words))
+      for op in (plan.random_operation() for i in range(n))
+    ]
+
+def test_plan_deterministic():
+    #the same seed gives the same operations and words, whatever random 
+    #calls are made in between
+    expected = _plan(5)
+    random.seed(1)
+    random.random()
+    assert _plan(5) == expected
+    assert _plan(6) != expected
+
+def test_plan_records():
+    #operations of the plan do not declare random variables
+    operation = StimulusPlan(5).random_operation()
+    assert not isinstance(operation, Randomized)
+    assert len(operation.words) == operation.repeat
+    assert operation.repeat_range[0] <= operation.repeat <= \
+      operation.repeat_range[1]
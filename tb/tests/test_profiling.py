@@ -0,0 +1,38 @@
+"""
+Testbench of the apbi2c controller - unit tests of the instrumentation
+
+"""
+
+from profiling import Profiler, WakeupCounter
+
+class _Agent(WakeupCounter):
+    pass
+
+def _callback(xaction):
+    return xaction
+
+def test_disabled():
+    agent = _Agent()
+    profiler = Profiler({"agent": agent}, enabled=False)
+    trigger = object()
+    #triggers are awaited directly, callbacks are not wrapped
+    assert agent._wait(trigger) is trigger
+    assert profiler.wrap("callback", _callback) is _callback
+    with profiler.segment("segment"):
+        pass
+    assert profiler.segments == {}
+
+def test_enabled():
+    agent = _Agent()
+    profiler = Profiler({"agent": agent})
+    class _Trigger(object):
+        def __await__(self):
+            return iter(())
+    coro = agent._wait(_Trigger())
+    try:
+        coro.send(None)
+    except StopIteration:
+        pass
+    assert agent.wakeups == 1
+    assert profiler.wrap("callback", _callback)(5) == 5
+    assert profiler.segments["callback"]["count"] == 1
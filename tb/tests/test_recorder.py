@@ -0,0 +1,31 @@
+"""
+Testbench of the apbi2c controller - unit tests of the transaction trace
+
+"""
+
+from recorder import TraceRecorder, read_trace, format_record, APB, I2C
+from apb import APBRecord
+from i2c import I2CRecord
+
+#simulator with 1 ps precision returns fractional ns
+def test_float_time(tmp_path, sim_time):
+    sim_time.ns = 1234.567
+    filename = tmp_path / "trace.bin"
+    trace = TraceRecorder(str(filename), capacity=2)
+    trace.apb(APBRecord(8, 0x12345678, True, 3))
+    trace.i2c(I2CRecord(0xCAFE, False))
+    trace.apb(APBRecord(4, None, False, 0))
+    trace.close()
+    records = list(read_trace(str(filename)))
+    assert [r.time for r in records] == [1234]*3
+    assert [r.interface for r in records] == [APB, I2C, APB]
+    assert records[0].data == 0x12345678 and records[0].write
+    assert records[2].data is None
+
+def test_unresolved_addr(sim_time):
+    sim_time.ns = 10
+    trace = TraceRecorder()
+    trace.apb(APBRecord(None, 1, True, 0))
+    record = list(trace.records())[0]
+    assert record.addr is None
+    assert "APB Write 'X' -> 0x00000001" in format_record(record)
@@ -0,0 +1,114 @@
+"""
+Testbench of the apbi2c controller - unit tests of the parallel regression
+(the simulations are replaced by fake processes)
+
+"""
+
+import os
+
+import pytest
+
+import regression
+from apb import APBRecord
+from coverage import APBCoverage, reset_coverage
+from cocotb_coverage.coverage import coverage_db
+from snapshots import CoverageSnapshots
+
+#coverage of seeds: APB transfers to one address in one direction per seed
+def _sample(*seeds):
+    reset_coverage()
+    sample = APBCoverage(lambda xaction : None)
+    for seed in seeds:
+        for delay in range(10):
+            sample(APBRecord(4*(seed % 4), 0, seed % 2 == 0, delay))
+    return coverage_db["top"].cover_percentage
+
+#simulation of a seed, its snapshots are written at the start, the coverage
+#report when it finishes after the given number of polls (never if None)
+class _Process(object):
+
+    def __init__(self, seed, run_dir, polls, runs):
+        os.makedirs(run_dir, exist_ok=True)
+        with open(os.path.join(run_dir, "run.log"), "w") as f:
+            f.write(regression.STARTED_MESSAGE)
+        _sample(seed)
+        CoverageSnapshots(os.path.join(run_dir, 
+          "results_coverage_snapshots.jsonl"), interval=0).snapshot()
+        self._report = os.path.join(run_dir, "results_coverage.xml")
+        coverage_db.export_to_xml(self._report + ".final")
+        self.polls = polls
+        self.returncode = None
+        self.runs = runs
+        runs.append(self)
+
+    @property
+    def running(self):
+        return self.returncode is None
+
+    def poll(self):
+        if self.running and (self.polls is not None):
+            self.polls -= 1
+            if self.polls <= 0:
+                os.replace(self._report + ".final", self._report)
+                self.returncode = 0
+        return self.returncode
+
+#started and stopped simulations
+class _Runs(list):
+
+    def __init__(self):
+        list.__init__(self)
+        self.stopped = []
+
+    def stop(self, process):
+        process.returncode = -15
+        self.stopped.append(process)
+
+@pytest.fixture
+def runs(monkeypatch):
+    runs = _Runs()
+    monkeypatch.setattr(regression, "stop_run", runs.stop)
+    return runs
+
+def _start(runs, polls, concurrency):
+    def start_run(seeds, run_dir, make_args):
+        concurrency.append(sum(1 for run in runs if run.running) + 1)
+        return _Process(seeds[0], run_dir, polls, runs)
+    return start_run
+
+def test_pool(runs, monkeypatch, tmp_path):
+    concurrency = []
+    monkeypatch.setattr(regression, "start_run", 
+      _start(runs, 2, concurrency))
+    coverage, merged_file = regression.run_regression(2, [1, 2, 3, 4, 5], 
+      100, str(tmp_path), [], log=lambda msg : None, poll=0, interval=3600)
+    #all seeds run, at most 2 at a time, the coverage of all merged
+    assert len(runs) == 5
+    assert max(concurrency) == 2
+    assert not runs.stopped
+    assert coverage == pytest.approx(_sample(1, 2, 3, 4, 5), abs=0.01)
+    assert coverage > _sample(1)
+    assert os.path.exists(merged_file)
+
+def test_stop_finished(runs, monkeypatch, tmp_path):
+    monkeypatch.setattr(regression, "start_run", _start(runs, 1, []))
+    target = _sample(1)
+    coverage, merged_file = regression.run_regression(2, [1, 3, 5, 7], 
+      target, str(tmp_path), [], log=lambda msg : None, poll=0, 
+      interval=3600)
+    #the target is reached by the first finished runs, the others are not 
+    #started
+    assert coverage >= target
+    assert len(runs) == 2
+
+def test_stop_in_progress(runs, monkeypatch, tmp_path):
+    monkeypatch.setattr(regression, "start_run", _start(runs, None, []))
+    single = _sample(1)
+    coverage, merged_file = regression.run_regression(2, [1, 2], 
+      single + 0.01, str(tmp_path), [], log=lambda msg : None, poll=0, 
+      interval=0)
+    #the runs never finish, the target is reached by their snapshots 
+    #together and both are stopped
+    assert coverage == pytest.approx(_sample(1, 2), abs=0.01)
+    assert len(runs.stopped) == 2
+    assert os.path.exists(merged_file)
@@ -0,0 +1,49 @@
+"""
+Testbench of the apbi2c controller - unit tests of the replay files
+
+"""
+
+import random
+
+from operations import StimulusPlan
+from replay import ReplayRecorder, Replay, clear_replays
+
+def test_background_state(tmp_path):
+    background = random.Random(3)
+    operation = StimulusPlan(1).random_operation()
+    recorder = ReplayRecorder(3, str(tmp_path))
+    recorder.begin("0", None, background.getstate())
+    replay = Replay(recorder.save(operation, None, 100))
+    assert replay.background_state == background.getstate()
+    assert list(replay.operation.words) == list(operation.words)
+    #seed and operation index in the name
+    assert recorder.saved[0].endswith("op_3_1.json")
+
+def test_no_background(tmp_path):
+    recorder = ReplayRecorder(3, str(tmp_path))
+    recorder.begin()
+    replay = Replay(recorder.save(StimulusPlan(1).random_operation()))
+    assert replay.background_state is None
+
+def test_clear_replays(tmp_path):
+    directory = str(tmp_path / "replay")
+    recorder = ReplayRecorder(3, directory)
+    recorder.begin()
+    recorder.save(StimulusPlan(1).random_operation())
+    clear_replays(directory)
+    clear_replays(directory)
+    assert not (tmp_path / "replay").exists()
+
+def test_reproducible(tmp_path):
+    recorder = ReplayRecorder(3, str(tmp_path))
+    replays = []
+    for i in range(2):
+        recorder.begin()
+        replays.append(Replay(recorder.save(
+          StimulusPlan(1).random_operation())))
+    #without a checkpoint only the first operation started from reset
+    assert [replay.reproducible for replay in replays] == [True, False]
+    recorder.begin("0")
+    replay = Replay(recorder.save(StimulusPlan(1).random_operation(), 
+      {}, 100))
+    assert replay.reproducible
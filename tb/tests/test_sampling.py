@@ -0,0 +1,30 @@
+"""
+Testbench of the apbi2c controller - unit tests of the bus signals sampling
+
+"""
+
+from cocotb.binary import BinaryValue
+
+from sampling import Sampler
+
+class _Handle(object):
+    def __init__(self, value):
+        self.value = value
+
+class _Bus(object):
+    def __init__(self, **values):
+        for name, value in values.items():
+            setattr(self, name, _Handle(value))
+
+def test_decode():
+    bus = _Bus(A=1, B=BinaryValue("1", 1), C=BinaryValue("0101", 4), 
+      D=BinaryValue("01x1", 4), E=BinaryValue("zzzz", 4), F="", 
+      G=BinaryValue("01z1", 4))
+    sampler = Sampler(bus, ["A", "B", "C", "D", "E", "F", "G"])
+    assert sampler.reader("A")() == (1,)
+    assert sampler.reader("B", "C")() == (1, 5)
+    assert sampler.reader("D", "E", "F", "G")() == (None,)*4
+    assert sampler.x_events == {"A": 0, "B": 0, "C": 0, "D": 1, "E": 0, 
+      "F": 1, "G": 0}
+    assert sampler.z_events["E"] == 1 and sampler.z_events["G"] == 1
+    assert sampler.errors == 4
@@ -0,0 +1,66 @@
+"""
+Testbench of the apbi2c controller - unit tests of the streaming scoreboard
+
+"""
+
+import logging
+
+from scoreboard import StreamingScoreboard
+
+def _scoreboard(depth=4):
+    return StreamingScoreboard("test", depth, 
+      log=logging.getLogger("test.scoreboard"))
+
+def test_in_order_match():
+    board = _scoreboard()
+    for item in [1, 2, 3]:
+        board.expect(item)
+    for item in [1, 2, 3]:
+        board.compare(item)
+    assert (board.matches, board.errors, board.outstanding) == (3, 0, 0)
+    assert board.flush()
+
+def test_mismatch():
+    board = _scoreboard()
+    board.expect(1)
+    board.expect(2)
+    board.compare(2)
+    board.compare(2)
+    assert (board.matches, board.mismatches) == (1, 1)
+    assert not board.flush()
+    #errors are counted per window
+    board.expect(3)
+    board.compare(3)
+    assert board.flush()
+
+def test_overflow_drop():
+    board = _scoreboard(depth=2)
+    for item in [1, 2, 3]:
+        board.expect(item)
+    #the oldest item is dropped, though it could still be received
+    assert (board.drops, board.outstanding) == (1, 2)
+    board.compare(2)
+    board.compare(3)
+    assert board.matches == 2
+    assert not board.flush()
+
+def test_window():
+    board = _scoreboard()
+    #nothing expected since the start or the last flush
+    board.compare(1)
+    assert (board.ignored, board.errors) == (1, 0)
+    board.expect(1)
+    board.compare(1)
+    board.compare(2)
+    assert board.extras == 1
+    assert not board.flush()
+    board.compare(3)
+    assert (board.ignored, board.extras) == (2, 1)
+
+def test_flush_drops_outstanding():
+    board = _scoreboard()
+    board.expect(1)
+    board.expect(2)
+    board.compare(1)
+    assert not board.flush()
+    assert (board.drops, board.outstanding) == (1, 0)
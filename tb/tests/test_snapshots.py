@@ -0,0 +1,49 @@
+"""
+Testbench of the apbi2c controller - unit tests of the coverage snapshots
+
+"""
+
+from cocotb_coverage.coverage import CoverPoint, coverage_db
+
+from snapshots import CoverageSnapshots, load_snapshots
+
+@CoverPoint("snap.value", xf=lambda value: value, bins=[0, 1, 2, 3])
+def _sample(value):
+    pass
+
+def _reset():
+    for bin in coverage_db["snap.value"]._hits:
+        coverage_db["snap.value"]._hits[bin] = 0
+
+def test_fresh_run_overwrites(tmp_path):
+    filename = str(tmp_path / "snapshots.jsonl")
+    _reset()
+    _sample(0)
+    CoverageSnapshots(filename, "snap").snapshot()
+    #an unrelated run, its snapshots do not add to the earlier ones
+    _reset()
+    _sample(1)
+    CoverageSnapshots(filename, "snap").snapshot()
+    _reset()
+    assert load_snapshots(filename, "snap") == 1
+    assert coverage_db["snap.value"].detailed_coverage == {0: 0, 1: 1, 2: 0, 
+      3: 0}
+
+def test_resumed_run_appends(tmp_path):
+    filename = str(tmp_path / "snapshots.jsonl")
+    _reset()
+    _sample(0)
+    CoverageSnapshots(filename, "snap").snapshot()
+    _reset()
+    load_snapshots(filename, "snap")
+    snapshots = CoverageSnapshots(filename, "snap", append=True)
+    _sample(2)
+    snapshots.snapshot()
+    #resumed into another file, the whole coverage goes to the first snapshot
+    other = str(tmp_path / "other.jsonl")
+    CoverageSnapshots(other, "snap").snapshot()
+    for name in (filename, other):
+        _reset()
+        load_snapshots(name, "snap")
+        assert coverage_db["snap.value"].detailed_coverage == {0: 1, 1: 0, 
+          2: 1, 3: 0}
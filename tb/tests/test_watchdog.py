@@ -0,0 +1,55 @@
+"""
+Testbench of the apbi2c controller - unit tests of the completion watchdog
+
+"""
+
+import mocksim
+import watchdog
+from mocksim import MockEntity, MockSim
+from watchdog import wait_for_completion
+
+PERIOD = 10
+
+#an operation raising done at done_cycle (never if None) and progressing 
+#(e.g. SCL edges) every 8 cycles until progress_cycles
+def _run(done_cycle, progress_cycles, timeout_cycles=1000, stall_cycles=50):
+    sim = MockSim(PERIOD, binary=True)
+    entity = MockEntity(sim, {"done": 0})
+    edges = [0]
+    async def operation():
+        for cycle in range(timeout_cycles + 1):
+            await mocksim.RisingEdge(sim.clock)
+            if (cycle < progress_cycles) and (cycle % 8 == 0):
+                edges[0] += 1
+            if cycle == done_cycle:
+                entity.done.value = 1
+    async def test():
+        sim.start_soon(operation())
+        return (await wait_for_completion(entity.done, PERIOD, timeout_cycles,
+          lambda : edges[0], stall_cycles), sim.now//PERIOD)
+    with sim.patched(watchdog):
+        return sim.run(test())
+
+def test_done():
+    #progressing operation, finished after several stall periods
+    assert _run(done_cycle=300, progress_cycles=300) == (None, 301)
+
+def test_stall():
+    #no progress since cycle 100, reported one or two stall periods later
+    result, cycle = _run(done_cycle=None, progress_cycles=100)
+    assert result == "stall"
+    assert 100 < cycle <= 100 + 2*50
+
+def test_timeout():
+    #progressing but never done
+    assert _run(done_cycle=None, progress_cycles=2000) == ("timeout", 1000)
+
+def test_no_progress_function():
+    sim = MockSim(PERIOD, binary=True)
+    entity = MockEntity(sim, {"done": 0})
+    with sim.patched(watchdog):
+        assert sim.run(wait_for_completion(entity.done, PERIOD, 100)) == \
+          "timeout"
+    entity.done.value = 1
+    with sim.patched(watchdog):
+        assert sim.run(wait_for_completion(entity.done, PERIOD, 100)) is None
@@ -0,0 +1,43 @@
+"""
+Testbench of the apbi2c controller - completion watchdog
+
+"""
+
+from cocotb.triggers import RisingEdge, First, Timer
+
+#number of I2C bit periods of a word: start, 32 data bits, 4 ACKs and stop
+I2C_WORD_BITS = 38
+
+#upper bound of the number of clock cycles needed to transfer words via 
+#I2C (SCL period is up to 2*(divider+1) cycles), with a safety margin
+def i2c_timeout_cycles(repeat, divider, margin=2):
+    return margin*repeat*I2C_WORD_BITS*2*(divider + 1) + 100
+
+#wait until SCL activity stops - a few SCL periods
+def i2c_stall_cycles(divider):
+    return max(256, 16*(divider + 1))
+
+#wait for the rising edge of the done signal, raced against a timeout,
+#if progress function is given (e.g. number of SCL edges so far), the wait 
+#is interrupted when it returns the same value after stall_cycles
+#returns None if done, otherwise "timeout" or "stall"
+async def wait_for_completion(done, period, timeout_cycles, progress=None, 
+                              stall_cycles=None):
+    if done.value.binstr == "1":
+        return None
+    if progress is None:
+        stall_cycles = timeout_cycles
+    else:
+        last_progress = progress()
+    elapsed = 0
+    while elapsed < timeout_cycles:
+        wait = min(stall_cycles, timeout_cycles - elapsed)
+        timer = Timer(wait*period)
+        if (await First(RisingEdge(done), timer)) is not timer:
+            return None
+        elapsed += wait
+        if progress is not None:
+            if progress() == last_progress:
+                return "stall"
+            last_progress = progress()
+    return "timeout"